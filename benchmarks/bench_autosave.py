@@ -0,0 +1,89 @@
+"""Measures the autosave of a large score: the snapshot taken on the GUI
+thread (which must stay under 1 ms) and the writes done on the worker
+thread, for a full save and for incremental saves with 100 to 10k changed
+records.
+"""
+
+from typing import Dict, List
+import argparse
+import os
+import tempfile
+
+from common import format_times, measure
+
+from app.score_journal import JOURNAL_SUFFIX, write_snapshot
+from app.score_model import KINDS, ScoreModel
+
+KIND_RESOURCES: Dict[str, List[str]] = {kind: [] for kind in KINDS}
+
+
+def create_score_model(count: int) -> ScoreModel:
+    score_model = ScoreModel()
+    for i in range(count):
+        score_model.add(
+            KINDS[i % len(KINDS)], (i * 37) % 9900, (i * 53) % 9900
+        )
+    return score_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument(
+        "--changes", type=int, nargs="+", default=[100, 1000, 5000, 10000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    score_model = create_score_model(args.count)
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, "autosave.score")
+    print(f"{args.count} records, {score_model.get_memory_usage()} bytes")
+
+    snapshots = [score_model.take_snapshot()]
+    for num_changes in args.changes:
+        times = measure(
+            lambda: snapshots.append(score_model.take_snapshot()),
+            args.repeat,
+            setup=lambda: score_model.dirty_ids.update(range(num_changes)),
+        )
+        print(
+            f"{f'snapshot of {num_changes} (GUI thread)':32s}  "
+            f"{format_times(times)}"
+        )
+
+    def setup_full_write():
+        snapshot = snapshots[-1]
+        snapshots[-1] = snapshot._replace(full=True)
+
+    times = measure(
+        lambda: write_snapshot(filename, snapshots[-1], KIND_RESOURCES),
+        args.repeat,
+        setup=setup_full_write,
+    )
+    print(f"{'full write (worker)':32s}  {format_times(times)}")
+
+    for num_changes in args.changes:
+
+        def setup_incremental_write():
+            for record_id in range(num_changes):
+                score_model.set_pos(record_id, record_id, record_id)
+            snapshots.append(score_model.take_snapshot())
+
+        times = measure(
+            lambda: write_snapshot(filename, snapshots[-1], KIND_RESOURCES),
+            args.repeat,
+            setup=setup_incremental_write,
+        )
+        print(
+            f"{f'incremental write of {num_changes}':32s}  "
+            f"{format_times(times)}"
+        )
+
+    for path in (filename, filename + JOURNAL_SUFFIX):
+        if os.path.exists(path):
+            os.remove(path)
+    os.rmdir(directory)
+
+if __name__ == "__main__":
+    main()
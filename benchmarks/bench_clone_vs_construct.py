@@ -0,0 +1,211 @@
+"""Compares GraphicTool.add_item of framework/tool.py (cloning prototypes)
+with framework/tool_without_prototype.py (constructing new graphics).
+
+Each case runs in its own process so that the peak RSS belongs to that case
+only. Save the results with --output and compare later runs against them with
+--baseline to catch regressions, e.g.:
+
+    python benchmarks/bench_clone_vs_construct.py --output baseline.json
+    python benchmarks/bench_clone_vs_construct.py --baseline baseline.json
+"""
+
+from typing import Dict, List, Optional
+import argparse
+import importlib
+import json
+import statistics
+import subprocess
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+FRAMEWORKS = {
+    "prototype": "framework.tool",
+    "without_prototype": "framework.tool_without_prototype",
+}
+GRAPHICS = ["staff", "whole_note", "half_note"]
+COUNTS = [1, 100, 10000]
+
+
+def run_case(framework: str, graphic: str, count: int, repeat: int) -> Dict:
+    from common import create_application, measure
+
+    from PySide2 import QtCore, QtWidgets
+
+    from app.graphic import HalfNote, Staff, WholeNote
+
+    create_application()
+    tool_module = importlib.import_module(FRAMEWORKS[framework])
+    prototype_classes = {
+        "staff": Staff,
+        "whole_note": WholeNote,
+        "half_note": HalfNote,
+    }
+    # Like MyGraphicsView, the prototype is created before the measurement
+    prototype = prototype_classes[graphic]()
+    scene = QtWidgets.QGraphicsScene()
+    scene.setSceneRect(0, 0, 10000, 10000)
+    positions = [
+        QtCore.QPointF((i * 37) % 9900, (i * 53) % 9900) for i in range(count)
+    ]
+
+    def add_items():
+        graphic_tool = tool_module.GraphicTool(scene, prototype)
+        for pos in positions:
+            graphic_tool.add_item(pos)
+
+    times = measure(add_items, repeat, setup=scene.clear)
+
+    # Python allocations only, the allocations of Qt are part of the RSS
+    scene.clear()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    add_items()
+    after = tracemalloc.take_snapshot()
+    _, allocation_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocations = sum(
+        stat.count_diff
+        for stat in after.compare_to(before, "filename")
+        if stat.count_diff > 0
+    )
+
+    return {
+        "framework": framework,
+        "graphic": graphic,
+        "count": count,
+        "times": times,
+        "median_time": statistics.median(times),
+        "allocations": allocations,
+        "allocation_peak": allocation_peak,
+        "peak_rss": get_peak_rss(),
+    }
+
+
+def get_peak_rss() -> Optional[int]:
+    """Gets the peak RSS of the process in bytes."""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The unit is bytes on macOS and kilobytes elsewhere
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def spawn_case(framework: str, graphic: str, count: int, repeat: int) -> Dict:
+    command = [
+        sys.executable,
+        __file__,
+        "--run-case",
+        framework,
+        graphic,
+        str(count),
+        "--repeat",
+        str(repeat),
+    ]
+    output = subprocess.run(
+        command, check=True, stdout=subprocess.PIPE, universal_newlines=True
+    ).stdout
+    # Qt may print other messages, the result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def get_case_key(result: Dict) -> str:
+    return f'{result["framework"]}/{result["graphic"]}/{result["count"]}'
+
+
+def print_result(result: Dict):
+    peak_rss = result["peak_rss"]
+    peak_rss_text = f"{peak_rss / 1024 ** 2:8.1f} MB" if peak_rss else "n/a"
+    print(
+        f"{get_case_key(result):32s}"
+        f"  {result['median_time'] * 1000:10.3f} ms"
+        f"  {result['allocations']:8d} allocations"
+        f"  {result['allocation_peak'] / 1024:10.1f} KB peak"
+        f"  RSS {peak_rss_text}"
+    )
+
+
+def find_regressions(
+    results: List[Dict], baseline: List[Dict], tolerance: float
+) -> List[str]:
+    baseline_times = {
+        get_case_key(result): result["median_time"] for result in baseline
+    }
+    regressions = []
+    for result in results:
+        key = get_case_key(result)
+        if key not in baseline_times:
+            continue
+        limit = baseline_times[key] * (1 + tolerance)
+        if result["median_time"] > limit:
+            regressions.append(
+                f"{key}: {result['median_time'] * 1000:.3f} ms > "
+                f"{baseline_times[key] * 1000:.3f} ms baseline"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--frameworks", nargs="+", choices=FRAMEWORKS, default=list(FRAMEWORKS)
+    )
+    parser.add_argument(
+        "--graphics", nargs="+", choices=GRAPHICS, default=GRAPHICS
+    )
+    parser.add_argument("--counts", type=int, nargs="+", default=COUNTS)
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed slowdown compared to the baseline (default: 0.2)",
+    )
+    parser.add_argument(
+        "--run-case",
+        nargs=3,
+        metavar=("FRAMEWORK", "GRAPHIC", "COUNT"),
+        help=argparse.SUPPRESS,
+    )
+    args = parser.parse_args()
+
+    if args.run_case:
+        framework, graphic, count = args.run_case
+        result = run_case(framework, graphic, int(count), args.repeat)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for graphic in args.graphics:
+        for count in args.counts:
+            for framework in args.frameworks:
+                result = spawn_case(framework, graphic, count, args.repeat)
+                print_result(result)
+                results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compares rotating a selection one graphic at a time with the batched
+rotation of MyGraphicsView.rotate_selected_items_right.
+"""
+
+from typing import List
+import argparse
+
+from common import create_application, format_times, measure
+
+from PySide2 import QtCore
+
+from app.graphic import Graphic, WholeNote
+from framework.tool import RotateTool
+from views.my_graphics_scene import MyGraphicsScene
+from views.my_graphics_view import MyGraphicsView
+
+
+def create_view(num_items: int) -> MyGraphicsView:
+    scene = MyGraphicsScene()
+    scene.setSceneRect(0, 0, 10000, 10000)
+    view = MyGraphicsView()
+    view.setScene(scene)
+
+    prototype = WholeNote()
+    for i in range(num_items):
+        graphic = prototype.clone()
+        graphic.setPos(QtCore.QPointF((i * 37) % 9900, (i * 53) % 9900))
+        scene.addItem(graphic)
+        graphic.setSelected(True)
+    return view
+
+
+def rotate_one_by_one(view: MyGraphicsView):
+    graphics: List[Graphic] = view.scene().selectedItems()
+    for graphic in graphics:
+        rotate_tool = RotateTool(view.scene(), graphic)
+        rotate_tool.rotate_right()
+        view.scene().selectionChanged.emit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 1000, 10000]
+    )
+    args = parser.parse_args()
+
+    create_application()
+
+    for num_items in args.sizes:
+        view = create_view(num_items)
+        emissions = []
+        view.scene().selectionChanged.connect(lambda: emissions.append(1))
+
+        times = measure(lambda: rotate_one_by_one(view), args.repeat)
+        num_emissions = len(emissions) // args.repeat
+        print(
+            f"{num_items:6d} items  one by one  {format_times(times)}"
+            f"  {num_emissions} selectionChanged"
+        )
+
+        emissions.clear()
+        times = measure(view.rotate_selected_items_right, args.repeat)
+        num_emissions = len(emissions) // args.repeat
+        print(
+            f"{num_items:6d} items  batched     {format_times(times)}"
+            f"  {num_emissions} selectionChanged"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compares the startup time of the resource modes of resources_loader.py.
+
+Each run starts a new process that registers the resources, imports the UI
+modules, creates the main window and reads an icon, so the time includes
+loading the embedded resources_rc module or mapping resources.rcc.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+STARTUP_SCRIPT = """
+import time
+start_time = time.perf_counter()
+
+import os
+import sys
+sys.path.insert(0, {src_dir!r})
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtCore, QtWidgets
+from resources_loader import register_resources
+register_resources({mode!r})
+from views.my_main_window import MyMainWindow
+
+app = QtWidgets.QApplication([])
+window = MyMainWindow(warm_up_prototypes=False)
+QtCore.QFile(":/graphics_view/icons/half_note.svg").size()
+print(time.perf_counter() - start_time)
+"""
+
+
+def run_startup(mode: str) -> float:
+    script = STARTUP_SCRIPT.format(
+        src_dir=os.path.normpath(SRC_DIR), mode=mode
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for mode in ["embedded", "rcc"]:
+        # The first run compiles the modules to bytecode
+        run_startup(mode)
+        times = [run_startup(mode) for _ in range(args.repeat)]
+        print(
+            f"{mode:10s}  min {min(times) * 1000:8.1f} ms"
+            f"  median {statistics.median(times) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Helpers shared by the benchmarks.
+
+The benchmarks run headless with the offscreen platform plugin, run them from
+the repository root, e.g.:
+
+    python benchmarks/bench_rotate.py
+"""
+
+from typing import Callable, List
+import os
+import statistics
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.normpath(SRC_DIR))
+
+# Must be set before creating the QApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtWidgets  # noqa: E402
+
+
+def create_application() -> QtWidgets.QApplication:
+    app = QtWidgets.QApplication.instance()
+    if not app:
+        app = QtWidgets.QApplication([])
+
+    # Register the icons used by the graphics
+    from resources_loader import register_resources
+
+    register_resources()
+
+    return app
+
+
+def measure(
+    func: Callable[[], None],
+    repeat: int = 5,
+    setup: Callable[[], None] = lambda: None,
+) -> List[float]:
+    """Measures the wall time of each call of func in seconds, setup is called
+    before each call and isn't measured.
+    """
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def format_times(times: List[float]) -> str:
+    return (
+        f"min {min(times) * 1000:10.3f} ms"
+        f"  median {statistics.median(times) * 1000:10.3f} ms"
+    )
@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import math
+
+from PySide2 import QtCore, QtGui, QtSvg, QtWidgets
+
+from app.level_of_detail import is_low_detail
+
+# Above this device scale the glyphs are painted as vectors, the pixmaps would
+# be too big and blurry compared to the vector paths
+MAX_PIXMAP_SCALE = 4.0
+
+# The rotations that RotateTool can produce
+RIGHT_ANGLE_ROTATIONS = (0, 90, 180, 270)
+
+
+class GlyphPixmapCache:
+    """Bounded cache of SVG glyphs rasterized at a device scale.
+
+    Each glyph is rasterized for all the right-angle rotations at once, so
+    rotating a note doesn't rasterize again. The scale is part of the key, so
+    the pixmaps are rebuilt lazily when the view transform changes and the
+    ones of the old scale are evicted as the least recently used.
+    """
+
+    def __init__(self, max_cost: int = 32 * 1024 * 1024):
+        self.max_cost = max_cost
+        self.cost = 0
+        self.pixmaps: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def find_or_create(
+        self,
+        filename: str,
+        renderer: QtSvg.QSvgRenderer,
+        size: QtCore.QSizeF,
+        scale: float,
+        rotation: int,
+    ) -> QtGui.QPixmap:
+        # Quantize the scale so that tiny differences share the same pixmaps
+        scale_key = round(scale * 64)
+        key = (filename, scale_key, rotation)
+        if key in self.pixmaps:
+            self.hits += 1
+            self.pixmaps.move_to_end(key)
+            return self.pixmaps[key]
+
+        self.misses += 1
+        for other_rotation in RIGHT_ANGLE_ROTATIONS:
+            other_key = (filename, scale_key, other_rotation)
+            if other_key not in self.pixmaps:
+                pixmap = self.rasterize(
+                    renderer, size, scale_key / 64, other_rotation
+                )
+                self.pixmaps[other_key] = pixmap
+                self.cost += self.get_pixmap_cost(pixmap)
+        self.pixmaps.move_to_end(key)
+        self.evict()
+        return self.pixmaps[key]
+
+    def rasterize(
+        self,
+        renderer: QtSvg.QSvgRenderer,
+        size: QtCore.QSizeF,
+        scale: float,
+        rotation: int,
+    ) -> QtGui.QPixmap:
+        width = max(1, math.ceil(size.width() * scale))
+        height = max(1, math.ceil(size.height() * scale))
+        if rotation in (90, 270):
+            image_size = QtCore.QSize(height, width)
+        else:
+            image_size = QtCore.QSize(width, height)
+
+        image = QtGui.QImage(
+            image_size, QtGui.QImage.Format_ARGB32_Premultiplied
+        )
+        image.fill(QtCore.Qt.transparent)
+
+        painter = QtGui.QPainter(image)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        # Rotate around the center of the image
+        painter.translate(image_size.width() / 2, image_size.height() / 2)
+        painter.rotate(rotation)
+        painter.translate(-width / 2, -height / 2)
+        renderer.render(painter, QtCore.QRectF(0, 0, width, height))
+        painter.end()
+
+        return QtGui.QPixmap.fromImage(image)
+
+    def evict(self):
+        while self.cost > self.max_cost and self.pixmaps:
+            _, pixmap = self.pixmaps.popitem(last=False)
+            self.cost -= self.get_pixmap_cost(pixmap)
+            self.evictions += 1
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.cost = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "pixmaps": len(self.pixmaps),
+            "cost": self.cost,
+            "max_cost": self.max_cost,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    @staticmethod
+    def get_pixmap_cost(pixmap: QtGui.QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * 4
+
+
+glyph_pixmap_cache = GlyphPixmapCache()
+
+
+class GlyphItem(QtSvg.QGraphicsSvgItem):
+    """SVG item that blits a cached pixmap instead of rendering the vector
+    paths on each paint.
+
+    It falls back to the vector paths when zoomed in beyond MAX_PIXMAP_SCALE,
+    when the item isn't rotated by a right angle or when painting on a vector
+    device.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        parent: Optional[QtWidgets.QGraphicsItem] = None,
+        hidden_at_low_detail: bool = False,
+    ):
+        super().__init__(parent)
+
+        self.filename = filename
+        # Whether the parent graphic paints a simpler shape instead at low
+        # detail
+        self.hidden_at_low_detail = hidden_at_low_detail
+
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        option: QtWidgets.QStyleOptionGraphicsItem,
+        widget: Optional[QtWidgets.QWidget] = None,
+    ):
+        if self.hidden_at_low_detail and is_low_detail(painter):
+            return
+
+        transform = painter.worldTransform()
+        scale, rotation = self.get_scale_and_rotation(transform)
+        device_pixel_ratio = painter.device().devicePixelRatioF()
+        device_scale = scale * device_pixel_ratio
+        if (
+            rotation is None
+            or device_scale > MAX_PIXMAP_SCALE
+            or not self.is_raster_painter(painter)
+        ):
+            super().paint(painter, option, widget)
+            return
+
+        rect = self.boundingRect()
+        pixmap = glyph_pixmap_cache.find_or_create(
+            self.filename, self.renderer(), rect.size(), device_scale, rotation
+        )
+        pixmap.setDevicePixelRatio(device_pixel_ratio)
+        device_rect = transform.mapRect(rect)
+
+        # Blit the pixmap in device coordinates, it's already scaled and
+        # rotated
+        painter.save()
+        painter.resetTransform()
+        painter.drawPixmap(device_rect.topLeft(), pixmap)
+        painter.restore()
+
+    @staticmethod
+    def is_raster_painter(painter: QtGui.QPainter) -> bool:
+        # Vector devices (e.g., SVG and PDF exports) should get the paths
+        engine = painter.paintEngine()
+        return engine is not None and engine.type() in (
+            QtGui.QPaintEngine.Raster,
+            QtGui.QPaintEngine.OpenGL2,
+        )
+
+    @staticmethod
+    def get_scale_and_rotation(
+        transform: QtGui.QTransform,
+    ) -> Tuple[float, Optional[int]]:
+        """Gets the uniform scale and the right-angle rotation of the
+        transform, the rotation is None if it's not a right angle or the
+        transform isn't a uniform scale and rotation.
+        """
+        scale_x = math.hypot(transform.m11(), transform.m12())
+        scale_y = math.hypot(transform.m21(), transform.m22())
+        if (
+            not transform.isAffine()
+            or transform.determinant() <= 0
+            or not math.isclose(scale_x, scale_y, rel_tol=1e-3)
+        ):
+            return scale_x, None
+
+        angle = math.degrees(math.atan2(transform.m12(), transform.m11()))
+        rotation = round(angle / 90) * 90
+        if not math.isclose(angle, rotation, abs_tol=1e-3):
+            return scale_x, None
+        return scale_x, rotation % 360
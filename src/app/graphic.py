@@ -1,12 +1,31 @@
 from __future__ import annotations
 
-from typing import Any, cast, Dict, List, Optional
+from typing import Any, cast, List, Optional
+import functools
 import math
 
 from PySide2 import QtCore, QtGui, QtSvg, QtWidgets
 
+from app.glyph_cache import GlyphItem
+from app.graphic_pool import GraphicPool
+from app.level_of_detail import is_low_detail
+from app.score_model import NO_STAFF_ID, ScoreModel
+from app.spatial_index import GridIndex
+from app.staff_lines_item import StaffLinesItem
+from app.svg_renderer_registry import (
+    svg_renderer_registry,
+    SvgRendererRegistry,
+)
+
 
 class Graphic(QtWidgets.QGraphicsItemGroup):
+    # The SVG files of the children, so that they can be parsed before the
+    # graphic is created
+    SVG_FILENAMES: List[str] = []
+    # The kind of the records in ScoreModel, graphics without kinds aren't
+    # stored in the model
+    KIND: Optional[str] = None
+
     def __init__(
         self,
         parent: Optional[QtWidgets.QGraphicsItem] = None,
@@ -16,7 +35,21 @@ class Graphic(QtWidgets.QGraphicsItemGroup):
 
         self.debug = False
 
+        # The record in the score model that the graphic is a view onto
+        self.score_model: Optional[ScoreModel] = None
+        self.record_id = -1
+        # Whether the graphic is stored in the score model of its scene, the
+        # temporary graphics (e.g., the ones dragged to measure the frame
+        # times) aren't
+        self.stored = True
+        # The graphic that it has snapped to in the last move
+        self.snapped_graphic: Optional[Graphic] = None
+        # Whether it has moved (and snapped or not) since the record was last
+        # updated, otherwise the staff of the record is kept
+        self.snap_changed = False
+
         self.reuse_svg_renderers(old_graphic)
+        self.reuse_pool(old_graphic)
 
         self.init_children()
         self.init_flags()
@@ -34,9 +67,54 @@ class Graphic(QtWidgets.QGraphicsItemGroup):
             new_pos = self.constrain_item_inside_scene(new_pos)
             new_pos = self.snap_item_to_nearest_item(new_pos)
             return new_pos
+        elif change == QtWidgets.QGraphicsItem.ItemSceneChange:
+            # Still in the old scene, so remove it from the old scene's index
+            snap_index = self.get_snap_index()
+            if snap_index is not None:
+                snap_index.discard(self)
+            # Only remove the record when it leaves the scene of its model,
+            # the graphics bound by clone_record are added to that scene
+            new_score_model = getattr(value, "score_model", None)
+            if (
+                self.score_model is not None
+                and new_score_model is not self.score_model
+            ):
+                self.score_model.remove(self.record_id)
+                self.unbind_record()
+        elif change == QtWidgets.QGraphicsItem.ItemSceneHasChanged:
+            self.update_snap_index()
+            self.bind_scene_record()
+        elif change in (
+            QtWidgets.QGraphicsItem.ItemPositionHasChanged,
+            QtWidgets.QGraphicsItem.ItemRotationHasChanged,
+            QtWidgets.QGraphicsItem.ItemScaleHasChanged,
+            QtWidgets.QGraphicsItem.ItemTransformHasChanged,
+            QtWidgets.QGraphicsItem.ItemFlagsHaveChanged,
+        ):
+            self.update_snap_index()
+            self.update_record()
 
         return super().itemChange(change, value)
 
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        option: QtWidgets.QStyleOptionGraphicsItem,
+        widget: Optional[QtWidgets.QWidget] = None,
+    ):
+        if is_low_detail(painter):
+            painter.save()
+            self.paint_low_detail(painter)
+            painter.restore()
+        # The selection outline
+        super().paint(painter, option, widget)
+
+    def paint_low_detail(self, painter: QtGui.QPainter):
+        """Paints a simpler shape in place of the children that aren't
+        painted at low detail (e.g., when a whole score is zoomed out).
+        """
+        pass
+
     def reuse_svg_renderers(self, old_graphic: Optional[Graphic]):
         if old_graphic:
             # Reuse the SVG renderers so we don't need to parse the SVG files
@@ -44,7 +122,16 @@ class Graphic(QtWidgets.QGraphicsItemGroup):
             # Reference: https://doc.qt.io/qt-5/qgraphicssvgitem.html#setSharedRenderer
             self.svg_renderers = old_graphic.svg_renderers
         else:
-            self.svg_renderers: Dict[str, QtSvg.QSvgRenderer] = {}
+            # Independently created graphics share the application-wide
+            # registry, so the same SVG file is only parsed once
+            self.svg_renderers: SvgRendererRegistry = svg_renderer_registry
+
+    def reuse_pool(self, old_graphic: Optional[Graphic]):
+        if old_graphic:
+            # All the clones of the same prototype share one pool
+            self.pool = old_graphic.pool
+        else:
+            self.pool = GraphicPool()
 
     def init_children(self):
         children = self.create_children()
@@ -107,28 +194,13 @@ class Graphic(QtWidgets.QGraphicsItemGroup):
     def snap_item_to_nearest_item(
         self, new_pos: QtCore.QPointF
     ) -> QtCore.QPointF:
+        self.snapped_graphic = None
+        self.snap_changed = True
         if not self.can_snap_to_others():
             return new_pos
 
         src_snap_point = new_pos + self.get_snap_point_translation()
-
-        scene_rect = self.scene().sceneRect()
-        items = self.scene().items(scene_rect)
-
-        # Get list of other groups
-        groups = filter(
-            lambda obj: (isinstance(obj, Graphic) and obj != self), items
-        )
-
-        # Keep only the groups that can be snapped
-        groups = filter(lambda obj: obj.can_be_snapped(), groups)
-
-        # Keep only the groups that have bounding rectangles on the source snap
-        # point (e.g., the hole of the whole note)
-        groups = filter(
-            lambda obj: (obj.sceneBoundingRect().contains(src_snap_point)),
-            groups,
-        )
+        groups = self.find_snap_targets(src_snap_point)
 
         nearest_snap_point = None
         nearest_snap_distance = float("inf")
@@ -144,6 +216,7 @@ class Graphic(QtWidgets.QGraphicsItemGroup):
             if snap_distance < nearest_snap_distance:
                 nearest_snap_point = dest_snap_point
                 nearest_snap_distance = snap_distance
+                self.snapped_graphic = group
 
         if nearest_snap_point:
             # We need to minus the translation since we want the point of the
@@ -151,18 +224,135 @@ class Graphic(QtWidgets.QGraphicsItemGroup):
             new_pos = nearest_snap_point - self.get_snap_point_translation()
         return new_pos
 
+    def find_snap_targets(
+        self, src_snap_point: QtCore.QPointF
+    ) -> List[Graphic]:
+        snap_index = self.get_snap_index()
+        if snap_index is not None:
+            # The index only holds the groups that can be snapped, keyed by
+            # their scene bounding rectangles
+            groups = snap_index.query_point(src_snap_point)
+            return [group for group in groups if group != self]
+
+        scene_rect = self.scene().sceneRect()
+        items = self.scene().items(scene_rect)
+
+        # Get list of other groups
+        groups = filter(
+            lambda obj: (isinstance(obj, Graphic) and obj != self), items
+        )
+
+        # Keep only the groups that can be snapped
+        groups = filter(lambda obj: obj.can_be_snapped(), groups)
+
+        # Keep only the groups that have bounding rectangles on the source snap
+        # point (e.g., the hole of the whole note)
+        groups = filter(
+            lambda obj: (obj.sceneBoundingRect().contains(src_snap_point)),
+            groups,
+        )
+        return list(groups)
+
+    def get_snap_index(self) -> Optional[GridIndex]:
+        # Only scenes that maintain a snap index (e.g., MyGraphicsScene) have
+        # the attribute, other scenes fall back to scanning all items
+        return getattr(self.scene(), "snap_index", None)
+
+    def update_snap_index(self):
+        snap_index = self.get_snap_index()
+        if snap_index is None:
+            return
+
+        if self.can_be_snapped():
+            snap_index.insert(self, self.sceneBoundingRect())
+        else:
+            snap_index.discard(self)
+
+    def get_scene_score_model(self) -> Optional[ScoreModel]:
+        # Only scenes that store a score model (e.g., MyGraphicsScene) have
+        # the attribute
+        return getattr(self.scene(), "score_model", None)
+
+    def bind_scene_record(self):
+        """Adds a record for the graphic to the score model of its scene,
+        unless the graphic is already bound to a record.
+        """
+        score_model = self.get_scene_score_model()
+        if score_model is None or self.KIND is None or not self.stored:
+            return
+        if self.score_model is not None:
+            return
+
+        record_id = score_model.add(
+            self.KIND, self.x(), self.y(), round(self.rotation())
+        )
+        self.bind_record(score_model, record_id)
+        self.update_record()
+
+    def bind_record(self, score_model: ScoreModel, record_id: int):
+        self.score_model = score_model
+        self.record_id = record_id
+        self.snap_changed = False
+        score_model.attach_view(record_id, self)
+
+    def unbind_record(self):
+        """Detaches the graphic from its record, the record stays in the
+        model.
+        """
+        if self.score_model is not None:
+            self.score_model.detach_view(self.record_id)
+        self.score_model = None
+        self.record_id = -1
+
+    def update_record(self):
+        if self.score_model is None:
+            return
+
+        self.score_model.set_pos(self.record_id, self.x(), self.y())
+        self.score_model.set_rotation(self.record_id, round(self.rotation()))
+        if self.snap_changed:
+            staff_id = NO_STAFF_ID
+            if (
+                self.snapped_graphic is not None
+                and self.snapped_graphic.score_model is self.score_model
+            ):
+                staff_id = self.snapped_graphic.record_id
+            self.score_model.set_staff_id(self.record_id, staff_id)
+            self.snap_changed = False
+        self.score_model.set_flags(self.record_id, int(self.flags()))
+
     def clone(self) -> Graphic:
         raise NotImplementedError()
 
+    def clone_record(self, score_model: ScoreModel, record_id: int) -> Graphic:
+        """Clones the graphic as a view onto a record of the score model,
+        e.g., a record of a loaded score.
+        """
+        record = score_model.get(record_id)
+        cloned_graphic = self.clone()
+        # Not in a scene yet, so the position isn't constrained or snapped
+        cloned_graphic.setPos(record.x, record.y)
+        cloned_graphic.setRotation(record.rotation)
+        cloned_graphic.setFlags(
+            QtWidgets.QGraphicsItem.GraphicsItemFlags(record.flags)
+        )
+        cloned_graphic.bind_record(score_model, record_id)
+        return cloned_graphic
+
     def create_children(self) -> List[QtWidgets.QGraphicsItem]:
         raise NotImplementedError()
 
-    def find_or_create_svg_item(self, filename: str) -> QtSvg.QGraphicsSvgItem:
-        if not filename in self.svg_renderers:
-            QtCore.qDebug(f'Create QSvgRenderer(filename="{filename}")')
-            self.svg_renderers[filename] = QtSvg.QSvgRenderer(filename)
-        item = QtSvg.QGraphicsSvgItem(self.parentItem())
-        item.setSharedRenderer(self.svg_renderers[filename])
+    def find_or_create_svg_item(
+        self, filename: str, hidden_at_low_detail: bool = False
+    ) -> QtSvg.QGraphicsSvgItem:
+        renderer = self.svg_renderers.acquire(filename)
+        item = GlyphItem(filename, self.parentItem(), hidden_at_low_detail)
+        item.setSharedRenderer(renderer)
+        # Release the renderer when the item is deleted, so the registry can
+        # evict it once no items use it
+        item.destroyed.connect(
+            functools.partial(self.svg_renderers.release, filename)
+        )
         return item
 
     def set_group_attributes(self, old_item: Graphic):
@@ -194,39 +384,114 @@ class Graphic(QtWidgets.QGraphicsItemGroup):
 
 
 class Staff(Graphic):
+    KIND = "staff"
+    G_CLEF_FILENAME = ":/graphics_view/icons/G-clef.svg"
+    SVG_FILENAMES = [G_CLEF_FILENAME]
+
     def __init__(
         self,
         parent: Optional[QtWidgets.QGraphicsItem] = None,
         old_graphic: Optional[Graphic] = None,
     ):
+        self.snap_area: Optional[QtCore.QRectF] = None
+        self.lines_item: Optional[StaffLinesItem] = None
+
         self.num_lines = 5
         self.horizontal_distance = 300
         # The height of the whole note is approximately 10 px
         self.vertical_gap = 10
         self.lines_offset = QtCore.QPointF(45, 41)
+        # Number of ledger lines the notes can snap to above and below the
+        # staff
+        self.num_ledger_lines = 3
 
         super().__init__(parent, old_graphic)
 
+    # The snap area and the lines depend on the following attributes, so we
+    # update them only when they change
+
+    @property
+    def num_lines(self) -> int:
+        return self._num_lines
+
+    @num_lines.setter
+    def num_lines(self, num_lines: int):
+        self._num_lines = num_lines
+        self.snap_area = None
+        self.update_lines_item()
+
+    @property
+    def horizontal_distance(self) -> float:
+        return self._horizontal_distance
+
+    @horizontal_distance.setter
+    def horizontal_distance(self, horizontal_distance: float):
+        self._horizontal_distance = horizontal_distance
+        self.snap_area = None
+        self.update_lines_item()
+
+    @property
+    def vertical_gap(self) -> float:
+        return self._vertical_gap
+
+    @vertical_gap.setter
+    def vertical_gap(self, vertical_gap: float):
+        self._vertical_gap = vertical_gap
+        self.snap_area = None
+        self.update_lines_item()
+
+    @property
+    def lines_offset(self) -> QtCore.QPointF:
+        # Return a copy so that modifying it in place can't skip the
+        # invalidation
+        return QtCore.QPointF(self._lines_offset)
+
+    @lines_offset.setter
+    def lines_offset(self, lines_offset: QtCore.QPointF):
+        self._lines_offset = QtCore.QPointF(lines_offset)
+        self.snap_area = None
+        self.update_lines_item()
+
+    @property
+    def num_ledger_lines(self) -> int:
+        return self._num_ledger_lines
+
+    @num_ledger_lines.setter
+    def num_ledger_lines(self, num_ledger_lines: int):
+        self._num_ledger_lines = num_ledger_lines
+        self.snap_area = None
+        self.update_lines_item()
+
     def clone(self) -> Graphic:
-        cloned_graphic = Staff(self.parentItem(), self)
+        cloned_graphic = self.pool.acquire()
+        if not cloned_graphic:
+            cloned_graphic = Staff(self.parentItem(), self)
         cloned_graphic.set_group_attributes(self)
         return cloned_graphic
 
     def create_children(self) -> List[QtWidgets.QGraphicsItem]:
         items = []
-        item = self.find_or_create_svg_item(":/graphics_view/icons/G-clef.svg")
+        item = self.find_or_create_svg_item(self.G_CLEF_FILENAME)
         item.setScale(2)
         items.append(item)
 
-        for i in range(self.num_lines):
-            y = self.lines_offset.y() + i * self.vertical_gap
-            x1 = self.lines_offset.x()
-            x2 = self.lines_offset.x() + self.horizontal_distance
-            line = QtWidgets.QGraphicsLineItem(x1, y, x2, y)
-            items.append(line)
+        # All the lines in one item
+        self.lines_item = StaffLinesItem()
+        self.update_lines_item()
+        items.append(self.lines_item)
 
         return items
 
+    def update_lines_item(self):
+        if self.lines_item is None:
+            return
+        self.lines_item.set_geometry(
+            self._lines_offset,
+            self._horizontal_distance,
+            self._vertical_gap,
+            self._num_lines,
+        )
+
     def get_snap_point_translation(self) -> QtCore.QPointF:
         # After adding the G clef to the group, the top left corner of the 5
         # lines is not (0, 0) anymore, the whole group now has large spacing
@@ -238,58 +503,74 @@ class Staff(Graphic):
         return self.rotation() == 0
 
     def get_dest_snap_point(self, local_pos: QtCore.QPointF) -> QtCore.QPointF:
-        lines_size = QtCore.QSizeF(
-            self.horizontal_distance, self.num_lines * self.vertical_gap
-        )
-        snap_area = QtCore.QRectF(self.lines_offset, lines_size)
-
-        # Slightly expand the snap area
-        snap_area.setLeft(snap_area.left() - 5)
-        snap_area.setRight(snap_area.right() + 5)
-        snap_area.setTop(snap_area.top() - 5)
-        snap_area.setBottom(snap_area.bottom() + 5)
-
         # We only want to snap the point inside the snap area, not inside the
         # entire bounding rectangle
-        if not snap_area.contains(local_pos):
+        if not self.get_snap_area().contains(local_pos):
             return local_pos
 
-        snap_y = None
-        closest_diff = float("inf")
-        # Line notes
-        for i in range(self.num_lines):
-            y = self.lines_offset.y() + i * self.vertical_gap
-            diff = abs(y - local_pos.y())
-            if diff < closest_diff:
-                snap_y = y
-                closest_diff = diff
-
-        # Space notes
-        for i in range(self.num_lines - 1):
-            y = self.lines_offset.y() + (i + 0.5) * self.vertical_gap
-            diff = abs(y - local_pos.y())
-            if diff < closest_diff:
-                snap_y = y
-                closest_diff = diff
+        # Lines and spaces are half a gap apart, so count the half gaps from
+        # the top line and round to the nearest one. The negative steps and the
+        # steps below the bottom line are the ledger lines and their spaces.
+        # The even steps are the lines, so rounding a tie to even snaps the
+        # points halfway between a line and a space to the line
+        half_gap = self._vertical_gap / 2
+        top_y = self._lines_offset.y()
+        step = round((local_pos.y() - top_y) / half_gap)
+        min_step = -2 * self._num_ledger_lines
+        max_step = 2 * (self._num_lines - 1 + self._num_ledger_lines)
+        step = min(max(step, min_step), max_step)
+
+        return QtCore.QPointF(local_pos.x(), top_y + step * half_gap)
+
+    def get_snap_area(self) -> QtCore.QRectF:
+        if self.snap_area is None:
+            ledger_height = self._num_ledger_lines * self._vertical_gap
+            lines_size = QtCore.QSizeF(
+                self._horizontal_distance,
+                self._num_lines * self._vertical_gap + 2 * ledger_height,
+            )
+            snap_area = QtCore.QRectF(self._lines_offset, lines_size)
+            snap_area.translate(0, -ledger_height)
 
-        return QtCore.QPointF(local_pos.x(), snap_y)
+            # Slightly expand the snap area
+            snap_area.adjust(-5, -5, 5, 5)
+            self.snap_area = snap_area
+        return self.snap_area
 
 
 class MusicalNote(Graphic):
+    # The size of the note head painted at low detail
+    NOTE_HEAD_SIZE = QtCore.QSizeF(14, 10)
+
     def can_snap_to_others(self) -> bool:
         return self.rotation() == 0
 
+    def paint_low_detail(self, painter: QtGui.QPainter):
+        # Only the note head at the snap point
+        head_rect = QtCore.QRectF(QtCore.QPointF(), self.NOTE_HEAD_SIZE)
+        head_rect.moveCenter(self.get_snap_point_translation())
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(QtCore.Qt.black)
+        painter.drawEllipse(head_rect)
+
 
 class WholeNote(MusicalNote):
+    KIND = "whole_note"
+    NOTE_FILENAME = ":/graphics_view/icons/whole_note.svg"
+    SVG_FILENAMES = [NOTE_FILENAME]
+
     def clone(self) -> Graphic:
-        cloned_graphic = WholeNote(self.parentItem(), self)
+        cloned_graphic = self.pool.acquire()
+        if not cloned_graphic:
+            cloned_graphic = WholeNote(self.parentItem(), self)
         cloned_graphic.set_group_attributes(self)
         return cloned_graphic
 
     def create_children(self) -> List[QtWidgets.QGraphicsItem]:
         items = [
             self.find_or_create_svg_item(
-                ":/graphics_view/icons/whole_note.svg")
+                self.NOTE_FILENAME, hidden_at_low_detail=True
+            )
         ]
         return items
 
@@ -299,14 +580,22 @@ class WholeNote(MusicalNote):
 
 
 class HalfNote(MusicalNote):
+    KIND = "half_note"
+    NOTE_FILENAME = ":/graphics_view/icons/half_note.svg"
+    SVG_FILENAMES = [NOTE_FILENAME]
+
     def clone(self) -> Graphic:
-        cloned_graphic = HalfNote(self.parentItem(), self)
+        cloned_graphic = self.pool.acquire()
+        if not cloned_graphic:
+            cloned_graphic = HalfNote(self.parentItem(), self)
         cloned_graphic.set_group_attributes(self)
         return cloned_graphic
 
     def create_children(self) -> List[QtWidgets.QGraphicsItem]:
         items = [
-            self.find_or_create_svg_item(":/graphics_view/icons/half_note.svg")
+            self.find_or_create_svg_item(
+                self.NOTE_FILENAME, hidden_at_low_detail=True
+            )
         ]
         return items
 
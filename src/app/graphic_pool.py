@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.graphic import Graphic
+
+
+class GraphicPool:
+    """Free list of the graphics cloned from the same prototype.
+
+    The graphics removed from the scene are kept here, so that cloning can
+    reuse them instead of allocating new groups and child items.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.free: List[Graphic] = []
+
+        self.reused = 0
+        self.created = 0
+        self.released = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.free)
+
+    def acquire(self) -> Optional[Graphic]:
+        if not self.free:
+            self.created += 1
+            return None
+
+        self.reused += 1
+        return self.free.pop()
+
+    def release(self, graphic: Graphic) -> bool:
+        # Graphics still in a scene or already in the pool can't be reused
+        if graphic.scene() or any(obj is graphic for obj in self.free):
+            return False
+
+        if len(self.free) >= self.max_size:
+            self.dropped += 1
+            return False
+
+        graphic.setSelected(False)
+        self.free.append(graphic)
+        self.released += 1
+        return True
+
+    def clear(self):
+        self.free.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        num_clones = self.reused + self.created
+        return {
+            "free": len(self.free),
+            "max_size": self.max_size,
+            "reused": self.reused,
+            "created": self.created,
+            "released": self.released,
+            "dropped": self.dropped,
+            "reuse_rate": self.reused / num_clones if num_clones else 0.0,
+        }
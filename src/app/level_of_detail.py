@@ -0,0 +1,12 @@
+from PySide2 import QtGui, QtWidgets
+
+# Below this level of detail (e.g., a whole score zoomed out to fit the view)
+# the graphics are painted as simple shapes instead of their children
+LOW_DETAIL_LEVEL = 0.5
+
+
+def is_low_detail(painter: QtGui.QPainter) -> bool:
+    level = QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+        painter.worldTransform()
+    )
+    return level < LOW_DETAIL_LEVEL
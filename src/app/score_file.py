@@ -0,0 +1,266 @@
+"""Binary score files.
+
+A score file is little-endian and laid out as follows, every column starts at
+an aligned offset so that it can be cast from the mapped file directly:
+
+    header      magic, version, number of records, number of removed
+                records and the offset of the tables
+    xs          float64 per record
+    ys          float64 per record
+    staff_ids   int32 per record
+    flags       uint32 per record
+    rotations   uint16 per record
+    kind_ids    uint8 per record, an index into the kind table
+    padding     up to a multiple of 8 bytes
+    tables      the string table (kind names and SVG resources) followed by
+                the kind table (name and resources of each kind)
+
+The removed records are kept, so the record ids (and the staff ids that refer
+to them) are the same after loading.
+"""
+
+from array import array
+from typing import Dict, List, Tuple
+import mmap
+import os
+import struct
+import sys
+
+from app.score_model import (
+    KIND_IDS,
+    KINDS,
+    REMOVED_KIND_ID,
+    Column,
+    ScoreModel,
+    copy_column,
+)
+
+SCORE_FILE_EXTENSION = ".score"
+SCORE_FILE_MAGIC = b"MSCR"
+SCORE_FILE_VERSION = 2
+
+# magic, version, reserved, num records, num removed records, tables offset
+HEADER = struct.Struct("<4sHHIIQ8x")
+# The indexes in ScoreModel.get_columns of the columns in the file, the wider
+# columns first so every column is aligned
+FILE_COLUMN_INDEXES = [2, 3, 1, 5, 4, 0]
+COLUMN_FORMATS = ["d", "d", "i", "I", "H", "B"]
+UINT16 = struct.Struct("<H")
+UINT32 = struct.Struct("<I")
+KIND_ENTRY = struct.Struct("<HH")
+
+
+def save_score(
+    filename: str,
+    score_model: ScoreModel,
+    kind_resources: Dict[str, List[str]],
+):
+    """Saves the score model, kind_resources are the SVG resources of each
+    kind (e.g., the SVG_FILENAMES of the graphics).
+    """
+    # The columns may be views onto the file being replaced (e.g., saving
+    # over the opened score), which can't be replaced while mapped on Windows
+    score_model.make_columns_growable()
+    save_columns(
+        filename,
+        score_model.get_columns(),
+        len(score_model.free_ids),
+        kind_resources,
+    )
+
+
+def save_columns(
+    filename: str,
+    columns: List[Column],
+    num_removed_records: int,
+    kind_resources: Dict[str, List[str]],
+):
+    """Saves the columns in the order of ScoreModel.get_columns (e.g., the
+    columns of a snapshot).
+    """
+    file_columns = [columns[index] for index in FILE_COLUMN_INDEXES]
+    num_records = len(file_columns[-1])
+    tables_offset = align(
+        HEADER.size
+        + sum(len(column) * column.itemsize for column in file_columns)
+    )
+
+    # Write to another file first, so a failed save doesn't break the score
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as f:
+        f.write(
+            HEADER.pack(
+                SCORE_FILE_MAGIC,
+                SCORE_FILE_VERSION,
+                0,
+                num_records,
+                num_removed_records,
+                tables_offset,
+            )
+        )
+        for column in file_columns:
+            f.write(to_little_endian(column))
+        f.write(b"\0" * (tables_offset - f.tell()))
+        f.write(pack_tables(kind_resources))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filename, filename)
+
+
+def load_score(
+    filename: str, score_model: ScoreModel
+) -> Dict[str, List[str]]:
+    """Loads the score file into the score model and gets the SVG resources
+    of each kind.
+
+    The file is mapped copy-on-write and the columns of the score model are
+    views onto the mapping, so nothing is copied or constructed per record.
+    The mapping is unmapped once the score model drops the columns.
+    """
+    with open(filename, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    data = memoryview(mapping)
+
+    if len(data) < HEADER.size:
+        raise ValueError(f'"{filename}" is not a score file')
+    (
+        magic,
+        version,
+        _,
+        num_records,
+        num_removed_records,
+        tables_offset,
+    ) = HEADER.unpack_from(data)
+    if magic != SCORE_FILE_MAGIC:
+        raise ValueError(f'"{filename}" is not a score file')
+    if version != SCORE_FILE_VERSION:
+        raise ValueError(f'Unsupported score file version "{version}"')
+    if not HEADER.size <= tables_offset <= len(data):
+        raise ValueError(f'"{filename}" is truncated')
+
+    file_columns: List[Column] = []
+    offset = HEADER.size
+    for column_format in COLUMN_FORMATS:
+        size = num_records * struct.calcsize(column_format)
+        if offset + size > tables_offset:
+            raise ValueError(f'"{filename}" is truncated')
+        column = data[offset : offset + size].cast(column_format)
+        file_columns.append(from_little_endian(column))
+        offset += size
+    kind_resources = unpack_tables(data, tables_offset)
+
+    columns: List[Column] = [None] * len(file_columns)
+    for file_column, index in zip(file_columns, FILE_COLUMN_INDEXES):
+        columns[index] = file_column
+
+    # Validate the kind ids before the score model gets them, so a corrupted
+    # file doesn't replace the score
+    file_kinds = list(kind_resources)
+    if len(file_kinds) > REMOVED_KIND_ID:
+        raise ValueError(f'"{filename}" is corrupted')
+    valid_kind_ids = bytes(range(len(file_kinds))) + bytes([REMOVED_KIND_ID])
+    kind_ids = bytes(columns[0])
+    if kind_ids.translate(None, valid_kind_ids):
+        raise ValueError(f'"{filename}" has unknown kind ids')
+    if kind_ids.count(REMOVED_KIND_ID) != num_removed_records:
+        raise ValueError(f'"{filename}" is corrupted')
+
+    # Map the kind ids of the file to the kind ids of the score model
+    if file_kinds != KINDS[: len(file_kinds)]:
+        columns[0] = translate_kind_ids(columns[0], file_kinds)
+
+    score_model.load_columns(*columns)
+    return kind_resources
+
+
+def align(offset: int, alignment: int = 8) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def to_little_endian(column: Column) -> bytes:
+    if sys.byteorder == "little" or column.itemsize == 1:
+        return column.tobytes()
+    swapped_column = copy_column(column)
+    swapped_column.byteswap()
+    return swapped_column.tobytes()
+
+
+def from_little_endian(column: memoryview) -> Column:
+    if sys.byteorder == "little" or column.itemsize == 1:
+        return column
+    # Big-endian hosts can't use the mapping directly
+    swapped_column = copy_column(column)
+    swapped_column.byteswap()
+    return swapped_column
+
+
+def translate_kind_ids(kind_ids: Column, file_kinds: List[str]) -> array:
+    table = bytearray(range(256))
+    for file_kind_id, kind in enumerate(file_kinds):
+        if kind not in KIND_IDS:
+            raise ValueError(f'Unknown item name "{kind}"')
+        table[file_kind_id] = KIND_IDS[kind]
+    table[REMOVED_KIND_ID] = REMOVED_KIND_ID
+    return array("B", bytes(kind_ids).translate(table))
+
+
+def pack_tables(kind_resources: Dict[str, List[str]]) -> bytes:
+    strings: List[str] = []
+    string_indexes: Dict[str, int] = {}
+
+    def get_string_index(string: str) -> int:
+        if string not in string_indexes:
+            string_indexes[string] = len(strings)
+            strings.append(string)
+        return string_indexes[string]
+
+    # Every kind of the score model, so the kind ids are the same
+    kind_table = [UINT32.pack(len(KINDS))]
+    for kind in KINDS:
+        resources = kind_resources.get(kind, [])
+        name_index = get_string_index(kind)
+        kind_table.append(KIND_ENTRY.pack(name_index, len(resources)))
+        for resource in resources:
+            kind_table.append(UINT16.pack(get_string_index(resource)))
+
+    string_table = [UINT32.pack(len(strings))]
+    for string in strings:
+        encoded_string = string.encode("utf-8")
+        string_table.append(UINT16.pack(len(encoded_string)))
+        string_table.append(encoded_string)
+
+    return b"".join(string_table + kind_table)
+
+
+def unpack_tables(data: memoryview, offset: int) -> Dict[str, List[str]]:
+    strings = []
+    (num_strings,), offset = unpack(UINT32, data, offset)
+    for _ in range(num_strings):
+        (length,), offset = unpack(UINT16, data, offset)
+        strings.append(bytes(data[offset : offset + length]).decode("utf-8"))
+        offset += length
+
+    kind_resources: Dict[str, List[str]] = {}
+    (num_kinds,), offset = unpack(UINT32, data, offset)
+    for _ in range(num_kinds):
+        (name_index, num_resources), offset = unpack(KIND_ENTRY, data, offset)
+        resources = []
+        for _ in range(num_resources):
+            (resource_index,), offset = unpack(UINT16, data, offset)
+            resources.append(get_string(strings, resource_index))
+        kind_resources[get_string(strings, name_index)] = resources
+    return kind_resources
+
+
+def get_string(strings: List[str], index: int) -> str:
+    if index >= len(strings):
+        raise ValueError("The score file is corrupted")
+    return strings[index]
+
+
+def unpack(
+    fields: struct.Struct, data: memoryview, offset: int
+) -> Tuple[tuple, int]:
+    if offset + fields.size > len(data):
+        raise ValueError("The score file is truncated")
+    return fields.unpack_from(data, offset), offset + fields.size
@@ -0,0 +1,154 @@
+"""Autosave files: a base score file plus a journal of the records changed
+since the base was written.
+
+The journal is a sequence of batches, one per snapshot. A batch is a header
+(magic and number of entries) followed by one entry per changed record. A
+batch that was only partly written (e.g., the application crashed) is
+ignored on recovery.
+"""
+
+from typing import Dict, Iterator, List, Tuple
+import os
+import struct
+
+from app.score_file import load_score, save_columns
+from app.score_model import (
+    NO_STAFF_ID,
+    REMOVED_KIND_ID,
+    ScoreModel,
+    ScoreSnapshot,
+)
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_MAGIC = b"MSCJ"
+
+BATCH_HEADER = struct.Struct("<4sI")
+# record id, kind id, staff id, x, y, rotation, flags
+ENTRY = struct.Struct("<IBiddHI")
+
+
+def write_snapshot(
+    filename: str,
+    snapshot: ScoreSnapshot,
+    kind_resources: Dict[str, List[str]],
+    max_journal_ratio: float = 0.5,
+) -> int:
+    """Writes the snapshot to the autosave files and gets the number of
+    bytes written.
+
+    Only the changed records are appended to the journal. The base file is
+    rewritten instead when the snapshot is full or the journal would grow
+    larger than max_journal_ratio of the base file.
+    """
+    journal_filename = filename + JOURNAL_SUFFIX
+    journal_size = (
+        os.path.getsize(journal_filename)
+        if os.path.exists(journal_filename)
+        else 0
+    )
+    batch_size = BATCH_HEADER.size + len(snapshot.dirty_ids) * ENTRY.size
+
+    if (
+        snapshot.full
+        or not os.path.exists(filename)
+        or journal_size + batch_size
+        > os.path.getsize(filename) * max_journal_ratio
+    ):
+        # Remove the journal first, a journal left over by a crash would
+        # otherwise be applied to the newer base file
+        if journal_size:
+            os.remove(journal_filename)
+        save_columns(
+            filename,
+            snapshot.columns,
+            snapshot.num_removed_records,
+            kind_resources,
+        )
+        return os.path.getsize(filename)
+
+    if not snapshot.dirty_ids:
+        return 0
+
+    batch = pack_batch(snapshot)
+    with open(journal_filename, "ab") as f:
+        f.write(batch)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(batch)
+
+
+def pack_batch(snapshot: ScoreSnapshot) -> bytes:
+    kind_ids, staff_ids, xs, ys, rotations, flags = snapshot.columns
+    entries = [BATCH_HEADER.pack(JOURNAL_MAGIC, len(snapshot.dirty_ids))]
+    for record_id in sorted(snapshot.dirty_ids):
+        entries.append(
+            ENTRY.pack(
+                record_id,
+                kind_ids[record_id],
+                staff_ids[record_id],
+                xs[record_id],
+                ys[record_id],
+                rotations[record_id],
+                flags[record_id],
+            )
+        )
+    return b"".join(entries)
+
+
+def recover_score(
+    filename: str, score_model: ScoreModel
+) -> Dict[str, List[str]]:
+    """Loads the autosave files into the score model and gets the SVG
+    resources of each kind.
+    """
+    recovered_model = ScoreModel()
+    kind_resources = load_score(filename, recovered_model)
+    # The autosave overwrites the file next, so don't keep it mapped
+    recovered_model.make_columns_growable()
+
+    journal_filename = filename + JOURNAL_SUFFIX
+    if os.path.exists(journal_filename):
+        columns = recovered_model.get_columns()
+        for entry in read_journal(journal_filename):
+            record_id = entry[0]
+            while len(recovered_model.kind_ids) <= record_id:
+                # Placeholders until the record is written
+                for column, value in zip(
+                    columns, (REMOVED_KIND_ID, NO_STAFF_ID, 0, 0, 0, 0)
+                ):
+                    column.append(value)
+            for column, value in zip(columns, entry[1:]):
+                column[record_id] = value
+
+    score_model.load_columns(*recovered_model.get_columns())
+    return kind_resources
+
+
+def move_autosave(filename: str, new_filename: str):
+    """Moves the autosave files (the base file and its journal), replacing
+    the autosave files at the new filename.
+    """
+    new_journal_filename = new_filename + JOURNAL_SUFFIX
+    # A journal left at the new filename would be applied to the moved base
+    # file
+    if os.path.exists(new_journal_filename):
+        os.remove(new_journal_filename)
+    os.replace(filename, new_filename)
+    journal_filename = filename + JOURNAL_SUFFIX
+    if os.path.exists(journal_filename):
+        os.replace(journal_filename, new_journal_filename)
+
+
+def read_journal(filename: str) -> Iterator[Tuple]:
+    with open(filename, "rb") as f:
+        data = f.read()
+
+    offset = 0
+    while offset + BATCH_HEADER.size <= len(data):
+        magic, num_entries = BATCH_HEADER.unpack_from(data, offset)
+        end = offset + BATCH_HEADER.size + num_entries * ENTRY.size
+        if magic != JOURNAL_MAGIC or end > len(data):
+            # Partly written
+            return
+        yield from ENTRY.iter_unpack(data[offset + BATCH_HEADER.size : end])
+        offset = end
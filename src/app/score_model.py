@@ -0,0 +1,359 @@
+from array import array
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+import mmap
+
+# The kinds of the graphics, the index of a kind is its type id
+KINDS = ["staff", "whole_note", "half_note"]
+KIND_IDS = {kind: kind_id for kind_id, kind in enumerate(KINDS)}
+
+# The type id of the removed records
+REMOVED_KIND_ID = 255
+# The staff id of the records that don't belong to any staff
+NO_STAFF_ID = -1
+# Snapshots copy whole columns when more than 1 / FULL_COPY_RATIO of the
+# records have changed. Copying a record costs about as much as copying 200
+# records in the whole columns (measured from 10k to 1M records), so copying
+# them one by one would be slower
+FULL_COPY_RATIO = 200
+
+# A column is an array, or a memoryview onto a mapped score file until the
+# first record is appended
+Column = Union[array, memoryview]
+
+
+class ScoreRecord(NamedTuple):
+    kind: str
+    staff_id: int
+    x: float
+    y: float
+    rotation: int
+    flags: int
+
+
+class ScoreSnapshot(NamedTuple):
+    # Copies of the columns in the order of ScoreModel.get_columns, they're
+    # updated in place by the next snapshot
+    columns: List[array]
+    # The records changed since the previous snapshot
+    dirty_ids: Set[int]
+    # Whether all the records should be saved (e.g., after loading a score)
+    full: bool
+    num_removed_records: int
+
+
+class ScoreModelListener:
+    """Gets notified of the changes of the records in ScoreModel."""
+
+    def on_record_added(self, record_id: int):
+        pass
+
+    def on_record_removed(self, record_id: int):
+        pass
+
+    def on_record_moved(self, record_id: int):
+        pass
+
+    def on_records_cleared(self):
+        pass
+
+    def on_records_loaded(self):
+        pass
+
+
+class ScoreModel:
+    """Compact score stored in parallel typed arrays.
+
+    It's the source of truth of the score, the graphics in the scene are only
+    views onto their records. A record takes 27 bytes: type id, staff id,
+    position, rotation and the flags of the graphic. The ids of the removed
+    records are reused by the new records, so the ids of the other records
+    never change.
+    """
+
+    def __init__(self):
+        self.kind_ids: Column = array("B")
+        self.staff_ids: Column = array("i")
+        self.xs: Column = array("d")
+        self.ys: Column = array("d")
+        self.rotations: Column = array("H")
+        self.flags: Column = array("I")
+
+        self.free_ids: List[int] = []
+        # The records changed since the last snapshot
+        self.dirty_ids: Set[int] = set()
+        self.all_dirty = True
+        # The copies of the columns of the last snapshot
+        self.snapshot_columns: Optional[List[array]] = None
+
+        # The views (e.g., graphics) of the records that currently have one
+        self.views: Dict[int, Any] = {}
+        self.listeners: List[ScoreModelListener] = []
+
+    def __len__(self) -> int:
+        return len(self.kind_ids) - len(self.free_ids)
+
+    def __contains__(self, record_id: int) -> bool:
+        return (
+            0 <= record_id < len(self.kind_ids)
+            and self.kind_ids[record_id] != REMOVED_KIND_ID
+        )
+
+    def add(
+        self,
+        kind: str,
+        x: float,
+        y: float,
+        rotation: int = 0,
+        staff_id: int = NO_STAFF_ID,
+        flags: int = 0,
+    ) -> int:
+        kind_id = KIND_IDS[kind]
+        rotation = int(rotation) % 360
+        if self.free_ids:
+            record_id = self.free_ids.pop()
+            self.kind_ids[record_id] = kind_id
+            self.staff_ids[record_id] = staff_id
+            self.xs[record_id] = x
+            self.ys[record_id] = y
+            self.rotations[record_id] = rotation
+            self.flags[record_id] = flags
+        else:
+            self.make_columns_growable()
+            record_id = len(self.kind_ids)
+            self.kind_ids.append(kind_id)
+            self.staff_ids.append(staff_id)
+            self.xs.append(x)
+            self.ys.append(y)
+            self.rotations.append(rotation)
+            self.flags.append(flags)
+        self.dirty_ids.add(record_id)
+
+        for listener in self.listeners:
+            listener.on_record_added(record_id)
+        return record_id
+
+    def remove(self, record_id: int):
+        if record_id not in self:
+            return
+
+        self.kind_ids[record_id] = REMOVED_KIND_ID
+        self.staff_ids[record_id] = NO_STAFF_ID
+        self.free_ids.append(record_id)
+        self.dirty_ids.add(record_id)
+        self.views.pop(record_id, None)
+
+        for listener in self.listeners:
+            listener.on_record_removed(record_id)
+
+    def clear(self):
+        self.kind_ids = array("B")
+        self.staff_ids = array("i")
+        self.xs = array("d")
+        self.ys = array("d")
+        self.rotations = array("H")
+        self.flags = array("I")
+        self.free_ids.clear()
+        self.dirty_ids.clear()
+        self.all_dirty = True
+        self.views.clear()
+
+        for listener in self.listeners:
+            listener.on_records_cleared()
+
+    def load_columns(
+        self,
+        kind_ids: Column,
+        staff_ids: Column,
+        xs: Column,
+        ys: Column,
+        rotations: Column,
+        flags: Column,
+    ):
+        """Replaces all the records with the columns without copying them,
+        e.g., the memoryviews of a mapped score file.
+        """
+        self.kind_ids = kind_ids
+        self.staff_ids = staff_ids
+        self.xs = xs
+        self.ys = ys
+        self.rotations = rotations
+        self.flags = flags
+        self.free_ids = self.find_removed_ids()
+        self.dirty_ids.clear()
+        self.all_dirty = True
+        self.views.clear()
+
+        for listener in self.listeners:
+            listener.on_records_loaded()
+
+    def make_columns_growable(self):
+        """Copies the columns that are memoryviews into arrays and closes the
+        mapped file that they were views onto.
+        """
+        if isinstance(self.kind_ids, array):
+            return
+
+        mappings = [
+            column.obj
+            for column in self.get_columns()
+            if isinstance(column, memoryview)
+        ]
+        (
+            self.kind_ids,
+            self.staff_ids,
+            self.xs,
+            self.ys,
+            self.rotations,
+            self.flags,
+        ) = [copy_column(column) for column in self.get_columns()]
+
+        # A mapped file can't be replaced on Windows (e.g., saving over the
+        # opened score), so don't wait for the garbage collector
+        for mapping in mappings:
+            if isinstance(mapping, mmap.mmap):
+                try:
+                    mapping.close()
+                except BufferError:
+                    # Other views are still alive (e.g., an iterator), the
+                    # mapping is closed once they're gone
+                    pass
+
+    def find_removed_ids(self) -> List[int]:
+        # Searching the bytes is much faster than iterating the column
+        kind_ids = bytes(self.kind_ids)
+        removed_ids = []
+        record_id = kind_ids.find(REMOVED_KIND_ID)
+        while record_id != -1:
+            removed_ids.append(record_id)
+            record_id = kind_ids.find(REMOVED_KIND_ID, record_id + 1)
+        return removed_ids
+
+    def attach_view(self, record_id: int, view: Any):
+        self.views[record_id] = view
+
+    def detach_view(self, record_id: int):
+        self.views.pop(record_id, None)
+
+    def get(self, record_id: int) -> ScoreRecord:
+        return ScoreRecord(
+            KINDS[self.kind_ids[record_id]],
+            self.staff_ids[record_id],
+            self.xs[record_id],
+            self.ys[record_id],
+            self.rotations[record_id],
+            self.flags[record_id],
+        )
+
+    def set_pos(self, record_id: int, x: float, y: float):
+        self.xs[record_id] = x
+        self.ys[record_id] = y
+        self.dirty_ids.add(record_id)
+
+        for listener in self.listeners:
+            listener.on_record_moved(record_id)
+
+    def set_rotation(self, record_id: int, rotation: int):
+        self.rotations[record_id] = int(rotation) % 360
+        self.dirty_ids.add(record_id)
+
+        for listener in self.listeners:
+            listener.on_record_moved(record_id)
+
+    def set_staff_id(self, record_id: int, staff_id: int):
+        self.staff_ids[record_id] = staff_id
+        self.dirty_ids.add(record_id)
+
+    def set_flags(self, record_id: int, flags: int):
+        self.flags[record_id] = flags
+        self.dirty_ids.add(record_id)
+
+    def take_snapshot(self) -> ScoreSnapshot:
+        """Copies the records and takes the changes since the previous
+        snapshot.
+
+        Only the changed and the new records are copied into the columns of
+        the previous snapshot, and the dirty ids are swapped out instead of
+        copied, so it's cheap enough for the GUI thread even for a large
+        score. The previous snapshot must have been written (e.g., by the
+        autosave worker) before taking the next one.
+        """
+        if (
+            self.all_dirty
+            or self.snapshot_columns is None
+            or len(self.dirty_ids) > len(self.kind_ids) // FULL_COPY_RATIO
+        ):
+            self.snapshot_columns = [
+                copy_column(column) for column in self.get_columns()
+            ]
+        else:
+            self.update_snapshot_columns()
+
+        snapshot = ScoreSnapshot(
+            self.snapshot_columns,
+            self.dirty_ids,
+            self.all_dirty,
+            len(self.free_ids),
+        )
+        self.dirty_ids = set()
+        self.all_dirty = False
+        return snapshot
+
+    def update_snapshot_columns(self):
+        num_copied = len(self.snapshot_columns[0])
+        copied_dirty_ids = [
+            record_id for record_id in self.dirty_ids if record_id < num_copied
+        ]
+        for snapshot_column, column in zip(
+            self.snapshot_columns, self.get_columns()
+        ):
+            # The records added since the previous snapshot
+            snapshot_column.extend(column[num_copied:])
+            for record_id in copied_dirty_ids:
+                snapshot_column[record_id] = column[record_id]
+
+    def iter_ids(self) -> Iterator[int]:
+        for record_id, kind_id in enumerate(self.kind_ids):
+            if kind_id != REMOVED_KIND_ID:
+                yield record_id
+
+    def get_bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """Gets the left, top, right and bottom of the positions of the
+        records, or None if there are no records. The removed records keep
+        their last positions, so they're included too.
+        """
+        if not len(self.xs):
+            return None
+        return min(self.xs), min(self.ys), max(self.xs), max(self.ys)
+
+    def get_columns(self) -> List[Column]:
+        return [
+            self.kind_ids,
+            self.staff_ids,
+            self.xs,
+            self.ys,
+            self.rotations,
+            self.flags,
+        ]
+
+    def get_memory_usage(self) -> int:
+        """Gets the number of bytes used by the records."""
+        return sum(
+            len(column) * column.itemsize for column in self.get_columns()
+        )
+
+
+def copy_column(column: Column) -> array:
+    view = memoryview(column)
+    copied_column = array(view.format)
+    copied_column.frombytes(view.cast("B"))
+    return copied_column
@@ -0,0 +1,166 @@
+from array import array
+from typing import Dict, Hashable, List, Set, Tuple
+import math
+
+from PySide2 import QtCore
+
+Cell = Tuple[int, int]
+
+
+class GridIndex:
+    """Uniform grid over bounding rectangles.
+
+    Each key is registered in every cell its rectangle overlaps, so a query
+    only touches the keys around the queried point instead of every item in
+    the scene.
+    """
+
+    def __init__(self, cell_size: float = 256):
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, Set[Hashable]] = {}
+        self.rects: Dict[Hashable, QtCore.QRectF] = {}
+        self.key_cells: Dict[Hashable, List[Cell]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rects)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.rects
+
+    def insert(self, key: Hashable, rect: QtCore.QRectF):
+        if key in self.rects:
+            self.discard(key)
+
+        cells = self.get_cells(rect)
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(key)
+        self.rects[key] = QtCore.QRectF(rect)
+        self.key_cells[key] = cells
+
+    def discard(self, key: Hashable):
+        if key not in self.rects:
+            return
+
+        for cell in self.key_cells.pop(key):
+            keys = self.cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+        del self.rects[key]
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+        self.key_cells.clear()
+
+    def query_point(self, point: QtCore.QPointF) -> List[Hashable]:
+        """Gets the keys whose rectangles contain the point."""
+        cell = self.get_cell(point.x(), point.y())
+        keys = self.cells.get(cell, ())
+        return [key for key in keys if self.rects[key].contains(point)]
+
+    def query_rect(self, rect: QtCore.QRectF) -> Set[Hashable]:
+        """Gets the keys whose rectangles intersect the rectangle."""
+        found = set()
+        for cell in self.get_cells(rect):
+            for key in self.cells.get(cell, ()):
+                if key not in found and self.rects[key].intersects(rect):
+                    found.add(key)
+        return found
+
+    def get_cell(self, x: float, y: float) -> Cell:
+        return (
+            math.floor(x / self.cell_size),
+            math.floor(y / self.cell_size),
+        )
+
+    def get_cells(self, rect: QtCore.QRectF) -> List[Cell]:
+        left, top = self.get_cell(rect.left(), rect.top())
+        right, bottom = self.get_cell(rect.right(), rect.bottom())
+        return [
+            (x, y)
+            for x in range(left, right + 1)
+            for y in range(top, bottom + 1)
+        ]
+
+
+class PointGridIndex:
+    """Uniform grid over points keyed by non-negative integer ids (e.g., the
+    record ids of ScoreModel).
+
+    It's lighter than GridIndex for many keys, the cell of each id is kept in
+    typed arrays indexed by the id instead of dicts of rectangles. A query
+    returns all the ids in the cells that overlap the rectangle.
+    """
+
+    NO_CELL = -(2 ** 31)
+
+    def __init__(self, cell_size: float = 512):
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, Set[int]] = {}
+        self.cell_xs = array("i")
+        self.cell_ys = array("i")
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: int) -> bool:
+        return key < len(self.cell_xs) and self.cell_xs[key] != self.NO_CELL
+
+    def insert(self, key: int, point: QtCore.QPointF):
+        cell = self.get_cell(point.x(), point.y())
+        if key in self:
+            if cell == (self.cell_xs[key], self.cell_ys[key]):
+                return
+            self.discard(key)
+
+        if key >= len(self.cell_xs):
+            num_new_keys = key + 1 - len(self.cell_xs)
+            self.cell_xs.extend([self.NO_CELL] * num_new_keys)
+            self.cell_ys.extend([self.NO_CELL] * num_new_keys)
+
+        self.cells.setdefault(cell, set()).add(key)
+        self.cell_xs[key], self.cell_ys[key] = cell
+        self.size += 1
+
+    def discard(self, key: int):
+        if key not in self:
+            return
+
+        cell = (self.cell_xs[key], self.cell_ys[key])
+        keys = self.cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.cells[cell]
+        self.cell_xs[key] = self.NO_CELL
+        self.cell_ys[key] = self.NO_CELL
+        self.size -= 1
+
+    def clear(self):
+        self.cells.clear()
+        del self.cell_xs[:]
+        del self.cell_ys[:]
+        self.size = 0
+
+    def query_rect(self, rect: QtCore.QRectF) -> Set[int]:
+        left, top = self.get_cell(rect.left(), rect.top())
+        right, bottom = self.get_cell(rect.right(), rect.bottom())
+        found: Set[int] = set()
+        if (right - left + 1) * (bottom - top + 1) > len(self.cells):
+            # Fewer occupied cells than cells in the rectangle
+            for (x, y), keys in self.cells.items():
+                if left <= x <= right and top <= y <= bottom:
+                    found.update(keys)
+            return found
+
+        for x in range(left, right + 1):
+            for y in range(top, bottom + 1):
+                found.update(self.cells.get((x, y), ()))
+        return found
+
+    def get_cell(self, x: float, y: float) -> Cell:
+        return (
+            math.floor(x / self.cell_size),
+            math.floor(y / self.cell_size),
+        )
@@ -0,0 +1,64 @@
+from typing import Optional
+
+from PySide2 import QtCore, QtGui, QtWidgets
+
+
+class StaffLinesItem(QtWidgets.QGraphicsItem):
+    """Paints all the lines of a staff as one path.
+
+    A single item instead of one line item per line keeps the scene index
+    and the paint calls small. The path is cached and only rebuilt when the
+    geometry changes.
+    """
+
+    def __init__(self, parent: Optional[QtWidgets.QGraphicsItem] = None):
+        super().__init__(parent)
+
+        self.pen = QtGui.QPen()
+        self.top_left = QtCore.QPointF()
+        self.length = 0.0
+        self.gap = 0.0
+        self.num_lines = 0
+        self.path: Optional[QtGui.QPainterPath] = None
+
+    def set_geometry(
+        self,
+        top_left: QtCore.QPointF,
+        length: float,
+        gap: float,
+        num_lines: int,
+    ):
+        self.prepareGeometryChange()
+        self.top_left = QtCore.QPointF(top_left)
+        self.length = length
+        self.gap = gap
+        self.num_lines = num_lines
+        self.path = None
+
+    def get_path(self) -> QtGui.QPainterPath:
+        if self.path is None:
+            path = QtGui.QPainterPath()
+            x1 = self.top_left.x()
+            x2 = x1 + self.length
+            for i in range(self.num_lines):
+                y = self.top_left.y() + i * self.gap
+                path.moveTo(x1, y)
+                path.lineTo(x2, y)
+            self.path = path
+        return self.path
+
+    def boundingRect(self) -> QtCore.QRectF:
+        # Include the half of the pen outside the lines
+        margin = max(self.pen.widthF(), 1) / 2
+        rect = self.get_path().boundingRect()
+        rect.adjust(-margin, -margin, margin, margin)
+        return rect
+
+    def paint(
+        self,
+        painter: QtGui.QPainter,
+        option: QtWidgets.QStyleOptionGraphicsItem,
+        widget: Optional[QtWidgets.QWidget] = None,
+    ):
+        painter.setPen(self.pen)
+        painter.drawPath(self.get_path())
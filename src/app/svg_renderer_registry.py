@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Dict
+
+from PySide2 import QtCore, QtSvg
+
+
+class SvgRendererRegistry:
+    """Application-wide QSvgRenderer cache keyed by resource path.
+
+    Renderers are reference counted by the items that share them. Renderers
+    without references stay cached until the estimated memory of all
+    renderers exceeds the memory budget, then the least recently used ones
+    are evicted.
+    """
+
+    def __init__(self, memory_budget: int = 16 * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self.memory_usage = 0
+
+        self.renderers: Dict[str, QtSvg.QSvgRenderer] = {}
+        self.ref_counts: Dict[str, int] = {}
+        self.costs: Dict[str, int] = {}
+        # Filenames of the unreferenced renderers, from the least recently
+        # used to the most recently used
+        self.unreferenced: OrderedDict = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.renderers
+
+    def acquire(self, filename: str) -> QtSvg.QSvgRenderer:
+        renderer = self.find_or_create(filename)
+        self.ref_counts[filename] += 1
+        self.unreferenced.pop(filename, None)
+        return renderer
+
+    def release(self, filename: str):
+        if filename not in self.renderers:
+            return
+
+        self.ref_counts[filename] -= 1
+        if self.ref_counts[filename] <= 0:
+            self.ref_counts[filename] = 0
+            self.unreferenced[filename] = None
+            self.evict()
+
+    def find_or_create(self, filename: str) -> QtSvg.QSvgRenderer:
+        if filename in self.renderers:
+            self.hits += 1
+            if filename in self.unreferenced:
+                self.unreferenced.move_to_end(filename)
+            return self.renderers[filename]
+
+        self.misses += 1
+        QtCore.qDebug(f'Create QSvgRenderer(filename="{filename}")')
+        self.add(filename, QtSvg.QSvgRenderer(filename))
+        return self.renderers[filename]
+
+    def add(self, filename: str, renderer: QtSvg.QSvgRenderer):
+        """Adds a renderer that has been created elsewhere."""
+        if filename in self.renderers:
+            return
+
+        # The parsed document is roughly proportional to the file size
+        cost = QtCore.QFile(filename).size()
+        self.renderers[filename] = renderer
+        self.ref_counts[filename] = 0
+        self.costs[filename] = cost
+        self.unreferenced[filename] = None
+        self.memory_usage += cost
+        self.evict()
+
+    def set_memory_budget(self, memory_budget: int):
+        self.memory_budget = memory_budget
+        self.evict()
+
+    def evict(self):
+        while self.memory_usage > self.memory_budget and self.unreferenced:
+            filename, _ = self.unreferenced.popitem(last=False)
+            QtCore.qDebug(f'Evict QSvgRenderer(filename="{filename}")')
+            del self.renderers[filename]
+            del self.ref_counts[filename]
+            self.memory_usage -= self.costs.pop(filename)
+            self.evictions += 1
+
+    def clear(self):
+        """Evicts all unreferenced renderers."""
+        memory_budget = self.memory_budget
+        self.set_memory_budget(0)
+        self.memory_budget = memory_budget
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "renderers": len(self.renderers),
+            "referenced": len(self.renderers) - len(self.unreferenced),
+            "memory_usage": self.memory_usage,
+            "memory_budget": self.memory_budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+svg_renderer_registry = SvgRendererRegistry()
@@ -21,6 +21,11 @@ TOOLKIT_ITEMS = [
     },
 ]
 
+# Index of the toolkit items by their normalized mime data URLs
+TOOLKIT_ITEMS_BY_URL = {
+    QtCore.QUrl(item["mimeData"]).toString(): item for item in TOOLKIT_ITEMS
+}
+
 
 class ToolkitItemModel(QtGui.QStandardItemModel):
     def mimeData(self, indexes):
@@ -0,0 +1,32 @@
+from typing import Iterator
+import contextlib
+
+from PySide2 import QtWidgets
+
+# Below this number of graphics, updating the scene index per graphic is
+# cheaper than rebuilding the whole index
+REINDEX_THRESHOLD = 256
+
+
+@contextlib.contextmanager
+def deferred_scene_index(
+    scene: QtWidgets.QGraphicsScene, num_graphics: int
+) -> Iterator[None]:
+    """Disables the scene index while changing many graphics, so the index is
+    rebuilt once afterwards instead of updated per graphic.
+    """
+    if num_graphics < REINDEX_THRESHOLD:
+        yield
+        return
+
+    index_method = scene.itemIndexMethod()
+    # Setting the index method resets the depth (e.g., of a performance
+    # profile), so restore it too
+    bsp_tree_depth = scene.bspTreeDepth()
+    scene.setItemIndexMethod(QtWidgets.QGraphicsScene.NoIndex)
+    try:
+        yield
+    finally:
+        scene.setItemIndexMethod(index_method)
+        if index_method == QtWidgets.QGraphicsScene.BspTreeIndex:
+            scene.setBspTreeDepth(bsp_tree_depth)
@@ -1,8 +1,9 @@
-from typing import Optional
+from typing import List, Optional
 
 from PySide2 import QtCore, QtWidgets
 
 from app.graphic import Graphic
+from framework.scene_batch import deferred_scene_index
 
 
 class Tool:
@@ -36,8 +37,41 @@ class RotateTool(Tool):
         self.selected_graphic = selected_graphic
 
     def rotate_right(self):
-        self.new_graphic = self.selected_graphic.clone()
-        new_rotation = (self.new_graphic.rotation() + 90) % 360
-        self.new_graphic.setRotation(new_rotation)
-        self.scene.removeItem(self.selected_graphic)
-        self.scene.addItem(self.new_graphic)
+        # Rotate in place so the graphic keeps its identity, selection and
+        # scene index entries
+        self.new_graphic = self.selected_graphic
+        self.new_graphic.setRotation(self.get_right_rotation())
+
+    def get_right_rotation(self) -> float:
+        return (self.selected_graphic.rotation() + 90) % 360
+
+
+class BatchRotateTool(Tool):
+    def __init__(
+        self,
+        scene: QtWidgets.QGraphicsScene,
+        selected_graphics: List[Graphic],
+    ):
+        super().__init__(scene)
+        self.selected_graphics = selected_graphics
+        self.new_graphics: List[Graphic] = []
+
+    def get_new_graphics(self) -> List[Graphic]:
+        return self.new_graphics
+
+    def rotate_right(self):
+        num_graphics = len(self.selected_graphics)
+        signals_blocked = self.scene.blockSignals(True)
+        try:
+            with deferred_scene_index(self.scene, num_graphics):
+                for graphic in self.selected_graphics:
+                    rotate_tool = RotateTool(self.scene, graphic)
+                    rotate_tool.rotate_right()
+                    new_graphic = rotate_tool.get_new_graphic()
+                    if new_graphic:
+                        self.new_graphics.append(new_graphic)
+        finally:
+            self.scene.blockSignals(signals_blocked)
+
+        # Emit one change for the whole batch
+        self.scene.selectionChanged.emit()
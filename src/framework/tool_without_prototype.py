@@ -3,6 +3,9 @@ from typing import Optional
 from PySide2 import QtCore, QtWidgets
 
 from app.graphic import Graphic, Staff, WholeNote, HalfNote
+# Rotating doesn't clone, so the batch rotation is the same with or without
+# the prototype pattern
+from framework.tool import BatchRotateTool  # noqa: F401
 
 
 class Tool:
@@ -84,8 +87,8 @@ class RotateTool(Tool):
         self.selected_graphic = selected_graphic
 
     def rotate_right(self):
-        self.new_graphic = self.selected_graphic.clone()
+        # Rotate in place, we can't clone the graphic without the prototype
+        # pattern anyway
+        self.new_graphic = self.selected_graphic
         new_rotation = (self.new_graphic.rotation() + 90) % 360
         self.new_graphic.setRotation(new_rotation)
-        self.scene.removeItem(self.selected_graphic)
-        self.scene.addItem(self.new_graphic)
@@ -1,16 +1,136 @@
-import sys
+import time
 
-from PySide2 import QtWidgets
+# Imported first so that the startup profile can include the imports
+START_TIME = time.perf_counter()
 
-from views.my_main_window import MyMainWindow
+import argparse  # noqa: E402
+import sys  # noqa: E402
+
+from PySide2 import QtCore, QtWidgets  # noqa: E402
+
+from resources_loader import register_resources, RESOURCE_MODES  # noqa: E402
+from startup_profiler import startup_profiler  # noqa: E402
+from views.performance_profile import PERFORMANCE_PROFILE_NAMES  # noqa: E402
 
 
 def main():
-    app = QtWidgets.QApplication([])
-    widget = MyMainWindow()
-    widget.show()
+    parser = argparse.ArgumentParser(
+        description="Music Score Editor (Prototype Pattern Demo)"
+    )
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="create the prototypes on the first drag instead of at startup",
+    )
+    parser.add_argument(
+        "--resources",
+        choices=RESOURCE_MODES,
+        default="auto",
+        help="how to load the icons (default: auto)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        nargs="?",
+        const="startup_trace.json",
+        metavar="FILENAME",
+        help="write the startup timeline as a Chrome trace event file "
+        "(default: startup_trace.json)",
+    )
+    parser.add_argument(
+        "--quit-after-startup",
+        action="store_true",
+        help="quit once the startup has finished, e.g., to profile it in "
+        "scripts",
+    )
+    parser.add_argument(
+        "--no-autosave",
+        action="store_true",
+        help="don't save the score periodically",
+    )
+    parser.add_argument(
+        "--recover-autosave",
+        nargs="?",
+        const="",
+        metavar="FILENAME",
+        help="open the score autosaved by the previous run, or the autosave "
+        "file moved aside by an earlier run",
+    )
+    parser.add_argument(
+        "--performance-profile",
+        choices=PERFORMANCE_PROFILE_NAMES,
+        default="default",
+        help="how the scene is indexed and the view is updated, auto picks "
+        "the fastest profile by measuring the frame times of the score "
+        "(default: default)",
+    )
+    args = parser.parse_args()
+    if args.no_autosave and args.recover_autosave is not None:
+        parser.error("--recover-autosave can't be used with --no-autosave")
+
+    if args.profile_startup:
+        startup_profiler.enable(START_TIME)
+        startup_profiler.add_phase("import", START_TIME, time.perf_counter())
+
+    with startup_profiler.phase("register resources"):
+        register_resources(args.resources)
+    with startup_profiler.phase("import UI"):
+        # Import after registering the resources, the generated UI module
+        # would import the embedded resources otherwise
+        from views.my_main_window import MyMainWindow
+
+    with startup_profiler.phase("create application"):
+        app = QtWidgets.QApplication([])
+    with startup_profiler.phase("create main window"):
+        autosave_filename = None
+        if not args.no_autosave:
+            autosave_filename = MyMainWindow.get_default_autosave_filename()
+        widget = MyMainWindow(
+            warm_up_prototypes=not args.no_warm_up,
+            autosave_filename=autosave_filename,
+            performance_profile=args.performance_profile,
+        )
+        recover_filename = args.recover_autosave
+        if recover_filename == "":
+            recover_filename = autosave_filename
+        widget.start_autosave(recover_filename)
+
+    if args.profile_startup or args.quit_after_startup:
+        watch_startup(app, widget, args)
+
+    with startup_profiler.phase("show main window"):
+        widget.show()
     sys.exit(app.exec_())
 
 
+def watch_startup(
+    app: QtWidgets.QApplication, widget: QtWidgets.QWidget, args
+):
+    """Waits for the first paint and the prototypes (if warmed up), then
+    writes the startup profile and quits if requested.
+    """
+    pending_steps = {"first paint"}
+    if not args.no_warm_up:
+        pending_steps.add("warm up")
+
+    def on_step_finished(step: str):
+        pending_steps.discard(step)
+        if pending_steps:
+            return
+
+        if args.profile_startup:
+            startup_profiler.write_chrome_trace(args.profile_startup)
+            QtCore.qDebug(f'Wrote startup profile to "{args.profile_startup}"')
+        if args.quit_after_startup:
+            app.quit()
+
+    startup_profiler.watch_first_paint(
+        widget.ui.graphicsView.viewport(),
+        lambda: on_step_finished("first paint"),
+    )
+    widget.ui.graphicsView.prototypes_warmed_up.connect(
+        lambda: on_step_finished("warm up")
+    )
+
+
 if __name__ == "__main__":
     main()
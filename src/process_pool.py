@@ -0,0 +1,71 @@
+"""Runs tasks in worker processes and survives a worker dying (e.g., a crash
+in native code or the OOM killer), which would make multiprocessing.Pool wait
+for its result forever.
+"""
+
+from concurrent.futures import as_completed, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+import multiprocessing
+
+
+def imap_unordered_isolated(
+    func: Callable[[Any], Any],
+    tasks: Iterable[Any],
+    num_jobs: int,
+    on_worker_died: Callable[[Any], Any],
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple = (),
+) -> Iterator[Any]:
+    """Calls func with each task in num_jobs worker processes and yields the
+    results as they finish.
+
+    A dead worker breaks the whole pool and the pool can't tell which task
+    killed it, so the unfinished tasks are run again one at a time in a new
+    worker process. The task that kills that worker gets the result of
+    on_worker_died instead.
+    """
+    # Forked workers would share the state of this process (e.g., its
+    # QApplication)
+    context = multiprocessing.get_context("spawn")
+
+    def create_executor(max_workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers,
+            mp_context=context,
+            initializer=initializer,
+            initargs=initargs,
+        )
+
+    broken_futures = set()
+    with create_executor(num_jobs) as executor:
+        futures: Dict[Future, Any] = {
+            executor.submit(func, task): task for task in tasks
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                broken_futures.add(future)
+                continue
+            yield result
+
+    # In the submitted order
+    unfinished_tasks = [
+        task for future, task in futures.items() if future in broken_futures
+    ]
+    executor = None
+    try:
+        for task in unfinished_tasks:
+            if executor is None:
+                executor = create_executor(1)
+            try:
+                result = executor.submit(func, task).result()
+            except BrokenProcessPool:
+                executor.shutdown()
+                executor = None
+                result = on_worker_died(task)
+            yield result
+    finally:
+        if executor is not None:
+            executor.shutdown()
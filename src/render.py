@@ -0,0 +1,395 @@
+"""Renders score files to PNG, SVG or PDF without a display, e.g.:
+
+    python src/render.py scores/*.score --formats png pdf --output-dir out
+
+The scenes are built from the same graphics as the editor under the offscreen
+platform plugin. The prototypes and the SVG renderers are created once and
+shared by all the files of the batch.
+
+With --jobs, the files are shared out to worker processes, each with its own
+QApplication, prototypes and SVG renderers. The files in a directory are
+rendered to the same relative paths in the output directory (the files given
+separately to their paths relative to their common directory), and a file that
+fails to render (even by killing its worker process) doesn't stop the others.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Optional
+import argparse
+import os
+import sys
+import time
+
+# Must be set before creating the QApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtCore, QtGui, QtSvg, QtWidgets  # noqa: E402
+
+from app.graphic import Graphic  # noqa: E402
+from app.score_file import load_score, SCORE_FILE_EXTENSION  # noqa: E402
+from process_pool import imap_unordered_isolated  # noqa: E402
+from resources_loader import register_resources, RESOURCE_MODES  # noqa: E402
+from views.my_graphics_scene import MyGraphicsScene  # noqa: E402
+from views.my_graphics_view import MyGraphicsView  # noqa: E402
+
+FORMATS = ["png", "svg", "pdf"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "filenames",
+        nargs="+",
+        metavar="FILENAME",
+        help="score files, or directories to render all the score files in",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", choices=FORMATS, default=["png"]
+    )
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="the scale of the PNG images (default: 1.0)",
+    )
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=20,
+        help="the margin around the score (default: 20)",
+    )
+    parser.add_argument(
+        "--resources",
+        choices=RESOURCE_MODES,
+        default="auto",
+        help="how to load the icons (default: auto)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="the number of worker processes, 0 for one per CPU (default: 1)",
+    )
+    args = parser.parse_args()
+
+    options = RenderOptions(
+        args.formats, args.scale, args.margin, args.resources
+    )
+    try:
+        tasks = collect_tasks(args.filenames, args.output_dir)
+    except ValueError as error:
+        parser.error(str(error))
+    num_jobs = args.jobs or os.cpu_count() or 1
+
+    start_time = time.perf_counter()
+    results = []
+    if num_jobs == 1:
+        init_worker(options)
+        for result in map(render_task, tasks):
+            print_result(result)
+            results.append(result)
+    else:
+        for result in imap_unordered_isolated(
+            render_task,
+            tasks,
+            num_jobs,
+            on_worker_died=get_worker_died_result,
+            initializer=init_worker,
+            initargs=(options,),
+        ):
+            print_result(result)
+            results.append(result)
+    seconds = time.perf_counter() - start_time
+
+    print_stats(results, seconds)
+    num_failures = sum(1 for result in results if result.error)
+    sys.exit(1 if num_failures else 0)
+
+
+class RenderOptions(NamedTuple):
+    formats: List[str]
+    scale: float
+    margin: float
+    resources: str
+
+
+class RenderTask(NamedTuple):
+    filename: str
+    output_dir: str
+
+
+# The worker id of the results of the files that killed their workers
+DEAD_WORKER_ID = 0
+
+
+class RenderResult(NamedTuple):
+    filename: str
+    output_filenames: List[str]
+    num_records: int
+    seconds: float
+    worker_id: int
+    error: Optional[str]
+
+
+# The application and the renderer of the worker process, created by
+# init_worker
+worker_app: Optional[QtWidgets.QApplication] = None
+worker_renderer: Optional[ScoreRenderer] = None
+
+
+def init_worker(options: RenderOptions):
+    global worker_app, worker_renderer
+
+    register_resources(options.resources)
+    worker_app = QtWidgets.QApplication([])
+    worker_renderer = ScoreRenderer(
+        options.formats, options.scale, options.margin
+    )
+
+
+def render_task(task: RenderTask) -> RenderResult:
+    start_time = time.perf_counter()
+    try:
+        os.makedirs(task.output_dir, exist_ok=True)
+        output_filenames = worker_renderer.render_file(
+            task.filename, task.output_dir
+        )
+        num_records = len(worker_renderer.scene.score_model)
+        error = None
+    except Exception as exception:
+        # Only this file fails, the worker goes on with the next one
+        output_filenames = []
+        num_records = 0
+        error = f"{type(exception).__name__}: {exception}"
+    return RenderResult(
+        task.filename,
+        output_filenames,
+        num_records,
+        time.perf_counter() - start_time,
+        os.getpid(),
+        error,
+    )
+
+
+def get_worker_died_result(task: RenderTask) -> RenderResult:
+    return RenderResult(
+        task.filename,
+        [],
+        0,
+        0.0,
+        DEAD_WORKER_ID,
+        "The worker process died while rendering it",
+    )
+
+
+def collect_tasks(filenames: List[str], output_dir: str) -> List[RenderTask]:
+    """Gets a task per score file. The files in the directories are rendered
+    to the same relative paths in the output directory, the other files to
+    their paths relative to their common directory.
+
+    Raises ValueError if two files would be rendered to the same output
+    files.
+    """
+    file_dirs = [
+        os.path.dirname(os.path.abspath(filename))
+        for filename in filenames
+        if not os.path.isdir(filename)
+    ]
+    common_dir = os.path.commonpath(file_dirs) if file_dirs else ""
+
+    tasks = []
+    for filename in filenames:
+        if not os.path.isdir(filename):
+            relative_dir = os.path.relpath(
+                os.path.dirname(os.path.abspath(filename)), common_dir
+            )
+            tasks.append(
+                RenderTask(
+                    filename,
+                    os.path.normpath(os.path.join(output_dir, relative_dir)),
+                )
+            )
+            continue
+        for root, _, names in os.walk(filename):
+            relative_dir = os.path.relpath(root, filename)
+            for name in names:
+                if name.endswith(SCORE_FILE_EXTENSION):
+                    tasks.append(
+                        RenderTask(
+                            os.path.join(root, name),
+                            os.path.normpath(
+                                os.path.join(output_dir, relative_dir)
+                            ),
+                        )
+                    )
+
+    # Otherwise the output of one file would be overwritten by another,
+    # depending on which worker finishes last
+    task_filenames: Dict[str, str] = {}
+    for task in tasks:
+        base_filename = os.path.normcase(
+            os.path.abspath(
+                get_output_base_filename(task.filename, task.output_dir)
+            )
+        )
+        if base_filename in task_filenames:
+            raise ValueError(
+                f'"{task.filename}" and "{task_filenames[base_filename]}" '
+                "would be rendered to the same files"
+            )
+        task_filenames[base_filename] = task.filename
+
+    # The largest files first, so no worker is left with a large file at the
+    # end of the batch
+    def get_size(task: RenderTask) -> int:
+        try:
+            return os.path.getsize(task.filename)
+        except OSError:
+            return 0
+
+    return sorted(tasks, key=lambda task: (-get_size(task), task.filename))
+
+
+def get_output_base_filename(filename: str, output_dir: str) -> str:
+    """Gets the output filename of the score file without the extension of
+    the format.
+    """
+    name = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(output_dir, name)
+
+
+def print_result(result: RenderResult):
+    if result.error:
+        print(
+            f'Failed to render "{result.filename}": {result.error}',
+            file=sys.stderr,
+        )
+        return
+    print(
+        f'Rendered "{result.filename}" to '
+        f'{", ".join(result.output_filenames)} in '
+        f"{result.seconds * 1000:.1f} ms"
+    )
+
+
+def print_stats(results: List[RenderResult], seconds: float):
+    worker_results: Dict[int, List[RenderResult]] = {}
+    for result in results:
+        if result.worker_id != DEAD_WORKER_ID:
+            worker_results.setdefault(result.worker_id, []).append(result)
+
+    for worker_id, results_of_worker in sorted(worker_results.items()):
+        busy_seconds = sum(result.seconds for result in results_of_worker)
+        num_failures = sum(1 for result in results_of_worker if result.error)
+        num_records = sum(result.num_records for result in results_of_worker)
+        print(
+            f"Worker {worker_id}: {len(results_of_worker)} files"
+            f" ({num_failures} failed) in {busy_seconds:.2f} s,"
+            f" {len(results_of_worker) / max(busy_seconds, 1e-9):.1f} files/s,"
+            f" {num_records / max(busy_seconds, 1e-9):.0f} records/s"
+        )
+    print(
+        f"Rendered {len(results)} files in {seconds:.2f} s,"
+        f" {len(results) / max(seconds, 1e-9):.1f} files/s"
+    )
+
+
+class ScoreRenderer:
+    """Builds the scene of each score file and renders it to the formats."""
+
+    def __init__(
+        self, formats: List[str], scale: float = 1.0, margin: float = 20
+    ):
+        self.formats = formats
+        self.scale = scale
+        self.margin = margin
+        self.scene = MyGraphicsScene()
+        # Like MyGraphicsView.cached_prototypes, shared by all the files
+        self.cached_prototypes: Dict[str, Graphic] = {}
+        self.last_seconds = 0.0
+
+    def render_file(self, filename: str, output_dir: str) -> List[str]:
+        """Renders the score file and gets the output filenames."""
+        start_time = time.perf_counter()
+        self.build_scene(filename)
+
+        source = self.scene.itemsBoundingRect()
+        source.adjust(-self.margin, -self.margin, self.margin, self.margin)
+        base_filename = get_output_base_filename(filename, output_dir)
+        output_filenames = []
+        for output_format in self.formats:
+            output_filename = f"{base_filename}.{output_format}"
+            render_func = getattr(self, f"render_{output_format}")
+            render_func(source, output_filename)
+            output_filenames.append(output_filename)
+
+        self.last_seconds = time.perf_counter() - start_time
+        return output_filenames
+
+    def build_scene(self, filename: str):
+        self.scene.clear()
+        score_model = self.scene.score_model
+        load_score(filename, score_model)
+        for record_id in score_model.iter_ids():
+            kind = score_model.get(record_id).kind
+            prototype = self.find_or_create_prototype(kind)
+            graphic = prototype.clone_record(score_model, record_id)
+            self.scene.addItem(graphic)
+
+    def find_or_create_prototype(self, kind: str) -> Graphic:
+        if kind not in self.cached_prototypes:
+            prototype_class = MyGraphicsView.get_prototype_class(kind)
+            self.cached_prototypes[kind] = prototype_class()
+        return self.cached_prototypes[kind]
+
+    def render_png(self, source: QtCore.QRectF, filename: str):
+        size = (source.size() * self.scale).toSize()
+        image = QtGui.QImage(size, QtGui.QImage.Format_ARGB32_Premultiplied)
+        image.fill(QtCore.Qt.white)
+        painter = QtGui.QPainter(image)
+        painter.setRenderHints(
+            QtGui.QPainter.Antialiasing | QtGui.QPainter.SmoothPixmapTransform
+        )
+        self.scene.render(painter, QtCore.QRectF(image.rect()), source)
+        painter.end()
+        if not image.save(filename):
+            raise OSError(f'Failed to write "{filename}"')
+
+    def render_svg(self, source: QtCore.QRectF, filename: str):
+        generator = QtSvg.QSvgGenerator()
+        generator.setFileName(filename)
+        generator.setSize(source.size().toSize())
+        generator.setViewBox(QtCore.QRectF(QtCore.QPointF(), source.size()))
+        generator.setTitle(os.path.basename(filename))
+        painter = QtGui.QPainter(generator)
+        self.scene.render(painter, generator.viewBoxF(), source)
+        painter.end()
+
+    def render_pdf(self, source: QtCore.QRectF, filename: str):
+        writer = QtGui.QPdfWriter(filename)
+        # One scene unit per point
+        writer.setResolution(72)
+        page_size = QtGui.QPageSize(
+            source.size(),
+            QtGui.QPageSize.Point,
+            "",
+            QtGui.QPageSize.ExactMatch,
+        )
+        # PySide2 only binds the setPageSize overload of the old page sizes
+        writer.setPageLayout(
+            QtGui.QPageLayout(
+                page_size, QtGui.QPageLayout.Portrait, QtCore.QMarginsF()
+            )
+        )
+        painter = QtGui.QPainter(writer)
+        self.scene.render(painter, QtCore.QRectF(), source)
+        painter.end()
+
+
+if __name__ == "__main__":
+    main()
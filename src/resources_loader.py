@@ -0,0 +1,44 @@
+"""Registers the Qt resources (e.g., the icons) in one of the modes:
+
+- embedded: imports the generated resources_rc module, which unmarshals the
+  resources from its bytes literals and copies them to Qt
+- rcc: registers the external binary resources.rcc file, which Qt memory maps
+  and only reads when the resources are accessed
+- auto: rcc if resources.rcc exists, otherwise embedded
+"""
+
+import os
+import sys
+import types
+
+from PySide2 import QtCore
+
+RCC_FILENAME = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "resources.rcc"
+)
+
+RESOURCE_MODES = ["auto", "embedded", "rcc"]
+
+
+def register_resources(mode: str = "auto") -> str:
+    """Registers the resources and returns the mode that has been used.
+
+    It should be called before importing the generated UI modules.
+    """
+    if mode == "auto":
+        mode = "rcc" if os.path.exists(RCC_FILENAME) else "embedded"
+
+    if mode == "rcc":
+        if not QtCore.QResource.registerResource(RCC_FILENAME):
+            raise RuntimeError(f'Failed to register "{RCC_FILENAME}"')
+
+        # The generated UI modules import resources_rc, let them import an
+        # empty module instead of registering the resources again
+        empty_module = types.ModuleType("resources_rc")
+        sys.modules.setdefault("resources_rc", empty_module)
+    elif mode == "embedded":
+        import resources_rc  # noqa: F401
+    else:
+        raise ValueError(f'Unknown resource mode "{mode}"')
+
+    return mode
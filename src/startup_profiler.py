@@ -0,0 +1,114 @@
+"""Records a phase-by-phase timeline of the startup and writes it as a
+Chrome trace event file, which can be opened in chrome://tracing or
+https://ui.perfetto.dev.
+
+The profiler is disabled by default, then recording a phase costs almost
+nothing.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional
+import contextlib
+import json
+import os
+import threading
+import time
+
+from PySide2 import QtCore, QtWidgets
+
+
+class FirstPaintFilter(QtCore.QObject):
+    def __init__(
+        self,
+        profiler: "StartupProfiler",
+        callback: Callable[[], None],
+        parent: Optional[QtCore.QObject] = None,
+    ):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.callback = callback
+        self.start_time = time.perf_counter()
+
+    def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent):
+        if event.type() == QtCore.QEvent.Paint:
+            watched.removeEventFilter(self)
+            paint_time = time.perf_counter()
+            self.profiler.add_phase(
+                "wait for first paint", self.start_time, paint_time
+            )
+            # The paint event is handled after the filter returns, so end
+            # the phase in the next event loop iteration
+            QtCore.QTimer.singleShot(0, lambda: self.on_painted(paint_time))
+        return False
+
+    def on_painted(self, paint_time: float):
+        self.profiler.add_phase("first paint", paint_time, time.perf_counter())
+        self.callback()
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.origin = 0.0
+        self.events: List[Dict] = []
+        self.first_paint_filter: Optional[FirstPaintFilter] = None
+
+    def enable(self, origin: Optional[float] = None):
+        """Starts recording, the timestamps are relative to the origin from
+        time.perf_counter().
+        """
+        self.enabled = True
+        self.origin = time.perf_counter() if origin is None else origin
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start_time, time.perf_counter())
+
+    def add_phase(
+        self,
+        name: str,
+        start_time: float,
+        end_time: float,
+        thread_id: Optional[int] = None,
+    ):
+        if not self.enabled:
+            return
+
+        self.events.append(
+            {
+                "name": name,
+                "cat": "startup",
+                "ph": "X",
+                "ts": (start_time - self.origin) * 1e6,
+                "dur": (end_time - start_time) * 1e6,
+                "pid": os.getpid(),
+                "tid": thread_id or threading.get_ident(),
+            }
+        )
+
+    def watch_first_paint(
+        self, widget: QtWidgets.QWidget, callback: Callable[[], None]
+    ):
+        """Records the first paint of the widget and then calls the
+        callback, the callback is called even if the profiler is disabled.
+        """
+        self.first_paint_filter = FirstPaintFilter(self, callback, widget)
+        widget.installEventFilter(self.first_paint_filter)
+
+    def write_chrome_trace(self, filename: str):
+        trace = {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+        }
+        with open(filename, "w") as f:
+            json.dump(trace, f, indent=2)
+
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,38 @@
+from PySide2 import QtCore, QtWidgets
+
+from app.score_model import ScoreModel
+from app.spatial_index import GridIndex
+
+# The initial extent of the score, an A4 page at 96 DPI
+DEFAULT_SCORE_RECT = QtCore.QRectF(0, 0, 794, 1123)
+
+
+class MyGraphicsScene(QtWidgets.QGraphicsScene):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Graphics that other graphics can snap to (e.g., staves), kept up to
+        # date by Graphic.itemChange
+        self.snap_index = GridIndex()
+        # The score that the graphics in the scene are views onto, kept up to
+        # date by Graphic.itemChange
+        self.score_model = ScoreModel()
+
+        # The logical extent of the score, it doesn't depend on the size of
+        # the views and only grows, so the index isn't rebuilt on resizes
+        self.setSceneRect(DEFAULT_SCORE_RECT)
+
+    def grow_score_rect(self, rect: QtCore.QRectF):
+        """Grows the scene rectangle to contain the rectangle."""
+        scene_rect = self.sceneRect()
+        grown_scene_rect = scene_rect.united(rect)
+        # Changing it rebuilds the index, so only change it if it grows
+        if grown_scene_rect != scene_rect:
+            self.setSceneRect(grown_scene_rect)
+
+    def clear(self):
+        # Deleting the items doesn't notify them, so reset the index and the
+        # model here
+        self.snap_index.clear()
+        self.score_model.clear()
+        super().clear()
@@ -1,24 +1,80 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Type
 
 from PySide2 import QtCore, QtGui, QtWidgets
 
 from app.graphic import Graphic, Staff, WholeNote, HalfNote
-from app.toolkit import TOOLKIT_ITEMS
-from framework.tool import GraphicTool, RotateTool
+from app.score_file import load_score, save_score
+from app.score_journal import recover_score
+from app.score_model import KINDS, ScoreModel
+from app.toolkit import TOOLKIT_ITEMS_BY_URL
+from framework.tool import BatchRotateTool, GraphicTool
+from startup_profiler import startup_profiler
+from views.performance_profile import (
+    apply_performance_profile,
+    auto_tune_performance,
+    AUTO_TUNE,
+    PERFORMANCE_PROFILES,
+)
+from views.prototype_warm_up import PrototypeWarmUp
+from views.score_virtualizer import ScoreVirtualizer
 
-# from framework.tool_without_prototype import GraphicTool, RotateTool
+# from framework.tool_without_prototype import BatchRotateTool, GraphicTool
 
 
 class MyGraphicsView(QtWidgets.QGraphicsView):
+    prototypes_warmed_up = QtCore.Signal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
         self.cached_prototypes: Dict[str, Graphic] = {}
         self.dragging_graphics: Optional[List[Graphic]] = None
 
+        # The toolkit items parsed from the mime data of the current drag
+        self.drag_mime_data: Optional[QtCore.QMimeData] = None
+        self.drag_items: List[Dict[str, str]] = []
+
+        # Drag moves can arrive much faster than the display refreshes, so
+        # the dragging graphics are moved at most once per frame and the
+        # latest position wins
+        self.pending_drag_scene_pos: Optional[QtCore.QPointF] = None
+        self.drag_move_timer = QtCore.QTimer(self)
+        self.drag_move_timer.setSingleShot(True)
+        self.drag_move_timer.timeout.connect(self.on_drag_move_timeout)
+
+        # Only the graphics in and near the viewport are in the scene, the
+        # rest of the score stays in the score model of the scene
+        self.score_virtualizer = ScoreVirtualizer(self)
+
+        # Resizes come in bursts, so grow the scene rectangle (which rebuilds
+        # the index) only after the last one
+        self.scene_rect_timer = QtCore.QTimer(self)
+        self.scene_rect_timer.setSingleShot(True)
+        self.scene_rect_timer.setInterval(200)
+        self.scene_rect_timer.timeout.connect(self.grow_scene_rect_to_view)
+
+        # Whether to tune the performance profile for each loaded score
+        self.auto_tune = False
+        self.pending_auto_tune = False
+        self.score_virtualizer.loader.finished.connect(self.on_score_loaded)
+
+    def setScene(self, scene: QtWidgets.QGraphicsScene):
+        super().setScene(scene)
+
+        score_model = getattr(scene, "score_model", None)
+        self.score_virtualizer.set_score_model(score_model)
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+
+        if self.pending_auto_tune:
+            # The frames can only be measured once the view is shown
+            self.pending_auto_tune = False
+            QtCore.QTimer.singleShot(0, self.auto_tune_performance)
+
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent):
         # Reference: https://gist.github.com/benjaminirving/f45de3bbabbcacd3ca29
-        items = self.parse_mime_data(event.mimeData())
+        items = self.parse_drag_mime_data(event.mimeData())
         if items:
             event.acceptProposedAction()
 
@@ -28,65 +84,235 @@ class MyGraphicsView(QtWidgets.QGraphicsView):
             self.dragging_graphics = self.add_graphics(
                 prototype_graphics, scene_pos
             )
+            self.drag_move_timer.setInterval(self.get_frame_interval())
 
     def dragMoveEvent(self, event: QtGui.QDragMoveEvent):
-        items = self.parse_mime_data(event.mimeData())
+        items = self.parse_drag_mime_data(event.mimeData())
         if items:
             event.acceptProposedAction()
 
             pos = event.pos()
-            scene_pos = self.mapToScene(pos.x(), pos.y())
-            for dragging_graphic in self.dragging_graphics:
-                translated_pos = (
-                    scene_pos - dragging_graphic.get_snap_point_translation()
-                )
-                dragging_graphic.setPos(translated_pos)
+            self.pending_drag_scene_pos = self.mapToScene(pos.x(), pos.y())
+            if not self.drag_move_timer.isActive():
+                # No move in the current frame yet, apply it right away
+                self.apply_pending_drag_move()
+                self.drag_move_timer.start()
 
     def dragLeaveEvent(self, event: QtGui.QDragLeaveEvent):
+        self.drag_move_timer.stop()
+        self.pending_drag_scene_pos = None
+        self.drag_mime_data = None
+
         if self.dragging_graphics:
             self.remove_graphics(self.dragging_graphics)
+            self.dragging_graphics = None
 
     def dropEvent(self, event: QtGui.QDropEvent):
-        items = self.parse_mime_data(event.mimeData())
+        items = self.parse_drag_mime_data(event.mimeData())
         if items:
             event.acceptProposedAction()
 
-            if not self.dragging_graphics:
-                self.remove_graphics(self.dragging_graphics)
+            # Drop at the latest position
+            self.drag_move_timer.stop()
+            self.apply_pending_drag_move()
 
+            if not self.dragging_graphics:
                 pos = event.pos()
                 scene_pos = self.mapToScene(pos.x(), pos.y())
                 prototypes = self.find_or_create_prototypes(items)
-                self.add_graphics(prototypes, scene_pos)
+                self.dragging_graphics = self.add_graphics(
+                    prototypes, scene_pos
+                )
+
+            # The dropped graphics stay in the scene
+            for graphic in self.dragging_graphics:
+                self.score_virtualizer.adopt(graphic)
+            self.dragging_graphics = None
+
+        self.drag_mime_data = None
 
     def resizeEvent(self, event: QtGui.QResizeEvent):
         super().resizeEvent(event)
 
-        # Update the scene rectangle to match the view
-        rect = self.contentsRect()
-        self.scene().setSceneRect(rect)
+        # A resize only changes the visible part of the score, the score
+        # grows to fill the view once the resize has ended
+        self.scene_rect_timer.start()
+        self.score_virtualizer.schedule_update()
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        super().scrollContentsBy(dx, dy)
+
+        self.score_virtualizer.schedule_update()
+
+    def grow_scene_rect_to_view(self):
+        scene = self.scene()
+        if scene is None:
+            return
+        viewport_rect = self.viewport().rect()
+        scene.grow_score_rect(self.mapToScene(viewport_rect).boundingRect())
+
+    def grow_scene_rect_to_records(self):
+        scene = self.scene()
+        bounds = scene.score_model.get_bounds()
+        if bounds is None:
+            return
+        left, top, right, bottom = bounds
+        # The bounds are the top-left points of the graphics
+        margin = self.score_virtualizer.margin
+        scene.grow_score_rect(
+            QtCore.QRectF(
+                QtCore.QPointF(left, top),
+                QtCore.QPointF(right + margin, bottom + margin),
+            )
+        )
+
+    def on_score_loaded(self):
+        if self.auto_tune:
+            self.schedule_auto_tune()
+
+    def on_drag_move_timeout(self):
+        if self.pending_drag_scene_pos is not None:
+            # Apply the latest move of the last frame and wait for another
+            # frame
+            self.apply_pending_drag_move()
+            self.drag_move_timer.start()
+
+    def apply_pending_drag_move(self):
+        scene_pos = self.pending_drag_scene_pos
+        self.pending_drag_scene_pos = None
+        if scene_pos is None or not self.dragging_graphics:
+            return
+
+        for dragging_graphic in self.dragging_graphics:
+            translated_pos = (
+                scene_pos - dragging_graphic.get_snap_point_translation()
+            )
+            dragging_graphic.setPos(translated_pos)
+
+    def get_frame_interval(self) -> int:
+        """Gets the interval between two frames of the screen in
+        milliseconds.
+        """
+        # QWidget.screen only exists in Qt 5.14 and later
+        window_handle = self.window().windowHandle()
+        if window_handle is not None:
+            screen = window_handle.screen()
+        else:
+            screen = QtGui.QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen else 0
+        if refresh_rate <= 0:
+            refresh_rate = 60
+        return max(1, round(1000 / refresh_rate))
 
     def find_or_create_prototypes(
         self, items: List[Dict[str, str]]
     ) -> List[Graphic]:
-        prototypes = []
-        for item in items:
-            name = item["name"]
-            if name not in self.cached_prototypes:
-                self.cached_prototypes[name] = self.create_prototype(name)
-            prototypes.append(self.cached_prototypes[name])
-        return prototypes
+        return [self.find_or_create_prototype(item["name"]) for item in items]
+
+    def find_or_create_prototype(self, name: str) -> Graphic:
+        if name not in self.cached_prototypes:
+            self.cached_prototypes[name] = self.create_prototype(name)
+        return self.cached_prototypes[name]
 
     def create_prototype(self, name: str) -> Graphic:
+        prototype_class = self.get_prototype_class(name)
+        with startup_profiler.phase(f'create prototype "{name}"'):
+            return prototype_class()
+
+    @staticmethod
+    def get_prototype_class(name: str) -> Type[Graphic]:
         if name == "staff":
-            return Staff()
+            return Staff
         elif name == "whole_note":
-            return WholeNote()
+            return WholeNote
         elif name == "half_note":
-            return HalfNote()
+            return HalfNote
         else:
             raise ValueError(f'Unknown item name "{name}"')
 
+    def warm_up_prototypes(self) -> PrototypeWarmUp:
+        """Creates the prototypes of all toolkit items ahead of the first
+        drag, their SVG files are parsed in worker threads.
+        """
+        warm_up = PrototypeWarmUp(self, self)
+        warm_up.finished.connect(self.prototypes_warmed_up)
+        warm_up.start()
+        return warm_up
+
+    def open_score_file(self, filename: str):
+        """Replaces the score with the score file, the records are streamed
+        into the scene by the loader of the virtualizer.
+        """
+        # Load it into another model first, so a file that fails to load
+        # doesn't replace the score
+        loaded_model = ScoreModel()
+        load_score(filename, loaded_model)
+
+        scene = self.scene()
+        scene.clear()
+        scene.score_model.load_columns(*loaded_model.get_columns())
+        self.grow_scene_rect_to_records()
+
+    def cancel_score_loading(self):
+        """Stops loading the score and discards the partially loaded score."""
+        loader = self.score_virtualizer.loader
+        if loader.is_loading():
+            loader.cancel()
+            self.scene().clear()
+
+    def save_score_file(self, filename: str):
+        save_score(
+            filename, self.scene().score_model, self.get_kind_resources()
+        )
+
+    def recover_autosave(self, filename: str):
+        recovered_model = ScoreModel()
+        recover_score(filename, recovered_model)
+
+        scene = self.scene()
+        scene.clear()
+        scene.score_model.load_columns(*recovered_model.get_columns())
+        self.grow_scene_rect_to_records()
+
+    def get_kind_resources(self) -> Dict[str, List[str]]:
+        return {
+            kind: self.get_prototype_class(kind).SVG_FILENAMES
+            for kind in KINDS
+        }
+
+    def set_performance_profile(self, name: str):
+        """Applies one of the performance profiles, or tunes the profile by
+        measuring the frame times of the current score and of each loaded
+        score if the name is "auto".
+        """
+        self.auto_tune = name == AUTO_TUNE
+        if self.auto_tune:
+            self.schedule_auto_tune()
+        else:
+            self.pending_auto_tune = False
+            apply_performance_profile(self, PERFORMANCE_PROFILES[name])
+
+    def schedule_auto_tune(self):
+        """Tunes the performance profile now if the view is shown, otherwise
+        once it's shown, the frames of a hidden view can't be measured.
+        """
+        if self.isVisible():
+            self.auto_tune_performance()
+        else:
+            self.pending_auto_tune = True
+
+    def auto_tune_performance(self) -> str:
+        name, median_frame_times = auto_tune_performance(self)
+        frame_times_text = ", ".join(
+            f"{profile_name} {seconds * 1000:.2f} ms"
+            for profile_name, seconds in median_frame_times.items()
+        )
+        QtCore.qDebug(
+            f'Applied performance profile "{name}" (median frame times: '
+            f"{frame_times_text})"
+        )
+        return name
+
     def add_graphics(
         self, prototypes: List[Graphic], scene_pos: QtCore.QPoint
     ) -> List[Graphic]:
@@ -100,7 +326,10 @@ class MyGraphicsView(QtWidgets.QGraphicsView):
 
     def remove_graphics(self, graphics: List[Graphic]):
         for graphic in graphics:
-            self.scene().removeItem(graphic)
+            if graphic.scene() == self.scene():
+                self.scene().removeItem(graphic)
+            # Let the next clone of the prototype reuse it
+            graphic.pool.release(graphic)
 
     def rotate_selected_items_right(self):
         items = self.scene().selectedItems()
@@ -108,17 +337,28 @@ class MyGraphicsView(QtWidgets.QGraphicsView):
         # Get list of graphics
         graphics = filter(lambda obj: isinstance(obj, Graphic), items)
 
-        for graphic in graphics:
-            rotate_tool = RotateTool(self.scene(), graphic)
-            rotate_tool.rotate_right()
-            new_graphic = rotate_tool.get_new_graphic()
-            if new_graphic:
-                new_graphic.setSelected(True)
+        rotate_tool = BatchRotateTool(self.scene(), list(graphics))
+        rotate_tool.rotate_right()
+        for new_graphic in rotate_tool.get_new_graphics():
+            new_graphic.setSelected(True)
+
+    def parse_drag_mime_data(
+        self, mime_data: QtCore.QMimeData
+    ) -> List[Dict[str, str]]:
+        # The mime data doesn't change during a drag, so only parse it on the
+        # first event of the drag
+        if mime_data is not self.drag_mime_data:
+            self.drag_mime_data = mime_data
+            self.drag_items = self.parse_mime_data(mime_data)
+        return self.drag_items
 
     @staticmethod
     def parse_mime_data(mime_data: QtCore.QMimeData) -> List[Dict[str, str]]:
         if not mime_data.hasUrls():
             return []
-        urls = mime_data.urls()
-        items = filter(lambda item: item["mimeData"] in urls, TOOLKIT_ITEMS)
-        return list(items)
+        items = []
+        for url in mime_data.urls():
+            item = TOOLKIT_ITEMS_BY_URL.get(url.toString())
+            if item and item not in items:
+                items.append(item)
+        return items
@@ -1,24 +1,112 @@
-from PySide2 import QtGui, QtWidgets
+from typing import Optional
+import os
 
+from PySide2 import QtCore, QtGui, QtWidgets
+
+from app.score_file import SCORE_FILE_EXTENSION
+from app.score_journal import move_autosave
+from app.svg_renderer_registry import svg_renderer_registry
 from app.toolkit import TOOLKIT_ITEMS, ToolkitItemModel
+from startup_profiler import startup_profiler
 
 from ui.mainwindow import Ui_MainWindow
+from views.my_graphics_scene import MyGraphicsScene
+from views.score_autosave import ScoreAutosave
+
+SCORE_FILE_FILTER = f"Scores (*{SCORE_FILE_EXTENSION})"
 
 
 class MyMainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
+    def __init__(
+        self,
+        warm_up_prototypes: bool = True,
+        autosave_filename: Optional[str] = None,
+        performance_profile: str = "default",
+    ):
         super().__init__()
+        self.pending_warm_up = warm_up_prototypes
+        self.performance_profile = performance_profile
         self.ui = Ui_MainWindow()
-        self.ui.setupUi(self)
-        self.scene = QtWidgets.QGraphicsScene(self)
+        with startup_profiler.phase("setup UI"):
+            self.ui.setupUi(self)
+        self.scene = MyGraphicsScene(self)
 
-        self.init_list_view()
+        with startup_profiler.phase("init list view"):
+            self.init_list_view()
         self.init_graphics_view()
+        self.init_status_bar()
         self.connect_toolbar_actions_signals()
         self.connect_graphics_scene_signals()
+        self.connect_score_loader_signals()
 
         self.on_scene_selection_changed()
 
+        self.autosave: Optional[ScoreAutosave] = None
+        if autosave_filename:
+            self.autosave = ScoreAutosave(
+                self.ui.graphicsView, autosave_filename, parent=self
+            )
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+
+        if self.pending_warm_up:
+            # Only once, and after the window has been shown
+            self.pending_warm_up = False
+            QtCore.QTimer.singleShot(
+                0, self.ui.graphicsView.warm_up_prototypes
+            )
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        if self.autosave:
+            # Don't quit in the middle of writing a snapshot
+            self.autosave.stop()
+        QtCore.qDebug(
+            f"SVG renderer registry: {svg_renderer_registry.get_stats()}"
+        )
+        super().closeEvent(event)
+
+    def start_autosave(self, recover_filename: Optional[str] = None):
+        """Starts autosaving, the autosave files of recover_filename (e.g.,
+        of the previous run) are recovered first.
+
+        The autosave files of the previous run that aren't recovered are
+        moved to get_previous_autosave_filename instead of overwritten, they
+        may be the only copy of the score after a crash.
+        """
+        if not self.autosave:
+            return
+        filename = self.autosave.filename
+        if recover_filename:
+            if os.path.exists(recover_filename):
+                self.ui.graphicsView.recover_autosave(recover_filename)
+            else:
+                QtCore.qWarning(f'No autosave "{recover_filename}" to recover')
+
+        if os.path.exists(filename) and not (
+            recover_filename and os.path.samefile(filename, recover_filename)
+        ):
+            previous_filename = self.get_previous_autosave_filename(filename)
+            move_autosave(filename, previous_filename)
+            QtCore.qWarning(
+                f'Moved the previous autosave to "{previous_filename}", '
+                f'recover it with --recover-autosave "{previous_filename}"'
+            )
+        self.autosave.start()
+
+    @staticmethod
+    def get_default_autosave_filename() -> str:
+        directory = QtCore.QStandardPaths.writableLocation(
+            QtCore.QStandardPaths.AppLocalDataLocation
+        )
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, "autosave" + SCORE_FILE_EXTENSION)
+
+    @staticmethod
+    def get_previous_autosave_filename(filename: str) -> str:
+        name, extension = os.path.splitext(filename)
+        return f"{name}.previous{extension}"
+
     def init_list_view(self):
         self.list_model = ToolkitItemModel(self.ui.listView)
 
@@ -34,8 +122,19 @@ class MyMainWindow(QtWidgets.QMainWindow):
 
     def init_graphics_view(self):
         self.ui.graphicsView.setScene(self.scene)
+        self.ui.graphicsView.set_performance_profile(self.performance_profile)
+
+    def init_status_bar(self):
+        self.loading_progress_bar = QtWidgets.QProgressBar(self)
+        self.loading_progress_bar.setMaximumWidth(200)
+        self.cancel_loading_button = QtWidgets.QPushButton("Cancel", self)
+        self.ui.statusbar.addPermanentWidget(self.loading_progress_bar)
+        self.ui.statusbar.addPermanentWidget(self.cancel_loading_button)
+        self.set_loading_widgets_visible(False)
 
     def connect_toolbar_actions_signals(self):
+        self.ui.actionOpen.triggered.connect(self.on_trigger_open)
+        self.ui.actionSaveAs.triggered.connect(self.on_trigger_save_as)
         self.ui.actionRotateRight.triggered.connect(
             self.on_trigger_rotate_right
         )
@@ -43,9 +142,62 @@ class MyMainWindow(QtWidgets.QMainWindow):
     def connect_graphics_scene_signals(self):
         self.scene.selectionChanged.connect(self.on_scene_selection_changed)
 
+    def connect_score_loader_signals(self):
+        loader = self.ui.graphicsView.score_virtualizer.loader
+        loader.progress.connect(self.on_score_loading_progress)
+        loader.finished.connect(self.on_score_loading_finished)
+        loader.cancelled.connect(self.on_score_loading_cancelled)
+        self.cancel_loading_button.clicked.connect(
+            self.ui.graphicsView.cancel_score_loading
+        )
+
+    def set_loading_widgets_visible(self, visible: bool):
+        self.loading_progress_bar.setVisible(visible)
+        self.cancel_loading_button.setVisible(visible)
+
+    def on_trigger_open(self):
+        filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Open Score", "", SCORE_FILE_FILTER
+        )
+        if not filename:
+            return
+        try:
+            self.ui.graphicsView.open_score_file(filename)
+        except (OSError, ValueError) as error:
+            QtWidgets.QMessageBox.warning(self, "Open Score", str(error))
+
+    def on_trigger_save_as(self):
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save Score", "", SCORE_FILE_FILTER
+        )
+        if not filename:
+            return
+        if not filename.endswith(SCORE_FILE_EXTENSION):
+            filename += SCORE_FILE_EXTENSION
+        try:
+            self.ui.graphicsView.save_score_file(filename)
+        except OSError as error:
+            QtWidgets.QMessageBox.warning(self, "Save Score", str(error))
+
     def on_trigger_rotate_right(self):
         self.ui.graphicsView.rotate_selected_items_right()
 
+    def on_score_loading_progress(
+        self, num_loaded_records: int, num_records: int
+    ):
+        self.loading_progress_bar.setMaximum(num_records)
+        self.loading_progress_bar.setValue(num_loaded_records)
+        self.set_loading_widgets_visible(True)
+        self.ui.statusbar.showMessage("Loading the score...")
+
+    def on_score_loading_finished(self):
+        self.set_loading_widgets_visible(False)
+        self.ui.statusbar.showMessage("Loaded the score", 3000)
+
+    def on_score_loading_cancelled(self):
+        self.set_loading_widgets_visible(False)
+        self.ui.statusbar.showMessage("Cancelled loading the score", 3000)
+
     def on_scene_selection_changed(self):
         selected_items = self.scene.selectedItems()
         self.ui.actionRotateRight.setEnabled(len(selected_items) > 0)
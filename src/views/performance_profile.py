@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from typing import Dict, List, NamedTuple, Tuple, TYPE_CHECKING
+import statistics
+import time
+
+from PySide2 import QtCore, QtWidgets
+
+if TYPE_CHECKING:
+    from views.my_graphics_view import MyGraphicsView
+
+AUTO_TUNE = "auto"
+
+
+class PerformanceProfile(NamedTuple):
+    item_index_method: QtWidgets.QGraphicsScene.ItemIndexMethod
+    # 0 lets Qt choose the depth from the number of items
+    bsp_tree_depth: int
+    viewport_update_mode: QtWidgets.QGraphicsView.ViewportUpdateMode
+    cache_background: bool
+    optimization_flags: QtWidgets.QGraphicsView.OptimizationFlags
+
+
+PERFORMANCE_PROFILES: Dict[str, PerformanceProfile] = {
+    # The defaults of Qt
+    "default": PerformanceProfile(
+        QtWidgets.QGraphicsScene.BspTreeIndex,
+        0,
+        QtWidgets.QGraphicsView.MinimalViewportUpdate,
+        False,
+        QtWidgets.QGraphicsView.OptimizationFlags(),
+    ),
+    # Large scores that are mostly viewed. A fixed depth doesn't make the
+    # index rebuild itself with another depth as a score is loading
+    "static": PerformanceProfile(
+        QtWidgets.QGraphicsScene.BspTreeIndex,
+        12,
+        QtWidgets.QGraphicsView.SmartViewportUpdate,
+        True,
+        QtWidgets.QGraphicsView.DontAdjustForAntialiasing,
+    ),
+    # Many graphics moving, e.g., dragging or rotating many graphics. The
+    # moves don't update an index and the repaints are merged into one
+    # rectangle
+    "dragging": PerformanceProfile(
+        QtWidgets.QGraphicsScene.NoIndex,
+        0,
+        QtWidgets.QGraphicsView.BoundingRectViewportUpdate,
+        True,
+        QtWidgets.QGraphicsView.DontAdjustForAntialiasing
+        | QtWidgets.QGraphicsView.DontSavePainterState,
+    ),
+}
+PERFORMANCE_PROFILE_NAMES = list(PERFORMANCE_PROFILES) + [AUTO_TUNE]
+
+# The toolkit items dragged while measuring the frame times
+DRAGGED_ITEM_NAMES = ["whole_note", "half_note"]
+
+
+def apply_performance_profile(
+    view: QtWidgets.QGraphicsView, profile: PerformanceProfile
+):
+    scene = view.scene()
+    scene.setItemIndexMethod(profile.item_index_method)
+    if profile.item_index_method == QtWidgets.QGraphicsScene.BspTreeIndex:
+        scene.setBspTreeDepth(profile.bsp_tree_depth)
+
+    view.setViewportUpdateMode(profile.viewport_update_mode)
+    view.setCacheMode(
+        QtWidgets.QGraphicsView.CacheBackground
+        if profile.cache_background
+        else QtWidgets.QGraphicsView.CacheNone
+    )
+    view.setOptimizationFlags(profile.optimization_flags)
+    view.resetCachedContent()
+
+
+def auto_tune_performance(
+    view: MyGraphicsView, num_frames: int = 30
+) -> Tuple[str, Dict[str, float]]:
+    """Measures the frame times of the current score with each profile and
+    applies the fastest one.
+
+    Gets the name of the applied profile and the median frame time of each
+    profile in seconds.
+    """
+    median_frame_times = {}
+    for name, profile in PERFORMANCE_PROFILES.items():
+        apply_performance_profile(view, profile)
+        # The first frame rebuilds the index, don't count it
+        measure_frame_times(view, 1)
+        frame_times = measure_frame_times(view, num_frames)
+        median_frame_times[name] = statistics.median(frame_times)
+
+    best_name = min(median_frame_times, key=median_frame_times.get)
+    apply_performance_profile(view, PERFORMANCE_PROFILES[best_name])
+    return best_name, median_frame_times
+
+
+def measure_frame_times(view: MyGraphicsView, num_frames: int) -> List[float]:
+    """Measures the time of each frame in seconds. The even frames drag new
+    graphics across the viewport like a drag from the toolkit, the odd frames
+    repaint the whole viewport.
+
+    The dragged graphics aren't stored in the score model, so the measuring
+    doesn't change the score (or what the autosave writes).
+    """
+    viewport_rect = view.viewport().rect()
+    scene = view.scene()
+    dragging_graphics = []
+    for name in DRAGGED_ITEM_NAMES:
+        graphic = view.find_or_create_prototype(name).clone()
+        graphic.stored = False
+        graphic.setPos(
+            view.mapToScene(viewport_rect.center())
+            - graphic.get_snap_point_translation()
+        )
+        scene.addItem(graphic)
+        dragging_graphics.append(graphic)
+
+    frame_times = []
+    for frame in range(num_frames):
+        start_time = time.perf_counter()
+        if frame % 2 == 0:
+            x = viewport_rect.width() * (frame + 1) / (num_frames + 1)
+            scene_pos = view.mapToScene(
+                QtCore.QPoint(round(x), viewport_rect.center().y())
+            )
+            for graphic in dragging_graphics:
+                translation = graphic.get_snap_point_translation()
+                graphic.setPos(scene_pos - translation)
+            # The first pass lets the scene tell the view the changed region,
+            # the second one paints it
+            for _ in range(2):
+                QtCore.QCoreApplication.processEvents(
+                    QtCore.QEventLoop.ExcludeUserInputEvents
+                )
+        else:
+            view.viewport().repaint()
+        frame_times.append(time.perf_counter() - start_time)
+
+    for graphic in dragging_graphics:
+        scene.removeItem(graphic)
+        graphic.stored = True
+        graphic.pool.release(graphic)
+    return frame_times
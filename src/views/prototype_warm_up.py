@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Set, TYPE_CHECKING
+import time
+
+from PySide2 import QtCore, QtSvg
+
+from app.svg_renderer_registry import svg_renderer_registry
+from app.toolkit import TOOLKIT_ITEMS
+from startup_profiler import startup_profiler
+
+if TYPE_CHECKING:
+    from views.my_graphics_view import MyGraphicsView
+
+
+class SvgParser(QtCore.QRunnable):
+    def __init__(self, filename: str, warm_up: PrototypeWarmUp):
+        super().__init__()
+        self.filename = filename
+        self.warm_up = warm_up
+
+    def run(self):
+        start_time = time.perf_counter()
+        renderer = QtSvg.QSvgRenderer(self.filename)
+        end_time = time.perf_counter()
+        startup_profiler.add_phase(
+            f'parse "{self.filename}"', start_time, end_time
+        )
+
+        # Hand the renderer over to the GUI thread that uses it, only the
+        # thread that owns an object can move it
+        renderer.moveToThread(QtCore.QCoreApplication.instance().thread())
+        self.warm_up.svg_parsed.emit(
+            self.filename, renderer, end_time - start_time
+        )
+
+
+class PrototypeWarmUp(QtCore.QObject):
+    """Creates the prototypes of all toolkit items ahead of the first drag.
+
+    The SVG files are parsed in worker threads, then the prototypes are
+    created on the GUI thread since graphics items can't be created in other
+    threads.
+    """
+
+    svg_parsed = QtCore.Signal(str, object, float)
+    finished = QtCore.Signal()
+
+    def __init__(self, view: MyGraphicsView, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.pending_filenames: Set[str] = set()
+        self.start_time = 0.0
+
+        # Emitted from the worker threads, so queue the calls to this thread
+        self.svg_parsed.connect(
+            self.on_svg_parsed, QtCore.Qt.QueuedConnection
+        )
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+        for item in TOOLKIT_ITEMS:
+            prototype_class = self.view.get_prototype_class(item["name"])
+            for filename in prototype_class.SVG_FILENAMES:
+                if filename not in svg_renderer_registry:
+                    self.pending_filenames.add(filename)
+
+        if not self.pending_filenames:
+            self.create_prototypes()
+            return
+
+        thread_pool = QtCore.QThreadPool.globalInstance()
+        for filename in sorted(self.pending_filenames):
+            thread_pool.start(SvgParser(filename, self))
+
+    def on_svg_parsed(
+        self, filename: str, renderer: QtSvg.QSvgRenderer, seconds: float
+    ):
+        QtCore.qDebug(
+            f'Parsed "{filename}" in a worker thread in '
+            f"{seconds * 1000:.1f} ms"
+        )
+        # The registry keeps its own renderer if the file has been parsed on
+        # the GUI thread in the meantime (e.g., dragged before finishing)
+        svg_renderer_registry.add(filename, renderer)
+
+        self.pending_filenames.discard(filename)
+        if not self.pending_filenames:
+            self.create_prototypes()
+
+    def create_prototypes(self):
+        for item in TOOLKIT_ITEMS:
+            start_time = time.perf_counter()
+            self.view.find_or_create_prototypes([item])
+            seconds = time.perf_counter() - start_time
+            QtCore.qDebug(
+                f'Created prototype "{item["name"]}" in '
+                f"{seconds * 1000:.1f} ms"
+            )
+
+        seconds = time.perf_counter() - self.start_time
+        QtCore.qDebug(f"Warmed up prototypes in {seconds * 1000:.1f} ms")
+        self.finished.emit()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Dict, List, TYPE_CHECKING
+import time
+
+from PySide2 import QtCore
+
+from app.score_journal import write_snapshot
+from app.score_model import ScoreSnapshot
+
+if TYPE_CHECKING:
+    from views.my_graphics_view import MyGraphicsView
+
+
+class SnapshotWriter(QtCore.QRunnable):
+    def __init__(
+        self,
+        filename: str,
+        snapshot: ScoreSnapshot,
+        kind_resources: Dict[str, List[str]],
+        autosave: ScoreAutosave,
+    ):
+        super().__init__()
+        self.filename = filename
+        self.snapshot = snapshot
+        self.kind_resources = kind_resources
+        self.autosave = autosave
+
+    def run(self):
+        start_time = time.perf_counter()
+        try:
+            num_bytes = write_snapshot(
+                self.filename, self.snapshot, self.kind_resources
+            )
+        except Exception as error:
+            # Always report back, otherwise the autosave would wait for this
+            # snapshot forever (and the next snapshot would update the columns
+            # that are being written)
+            self.autosave.failed.emit(f"{type(error).__name__}: {error}")
+            return
+        seconds = time.perf_counter() - start_time
+        self.autosave.saved.emit(num_bytes, seconds)
+
+
+class ScoreAutosave(QtCore.QObject):
+    """Periodically saves the score of the scene of the view.
+
+    A snapshot of the score model is taken on the GUI thread, then it's
+    written and fsynced on a worker thread. Only the records changed since
+    the previous snapshot are written, see app/score_journal.py.
+    """
+
+    saved = QtCore.Signal(int, float)
+    failed = QtCore.Signal(str)
+
+    def __init__(
+        self,
+        view: MyGraphicsView,
+        filename: str,
+        interval: int = 5000,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.view = view
+        self.filename = filename
+        self.writing = False
+
+        # The GUI thread cost of the snapshots in seconds
+        self.last_snapshot_seconds = 0.0
+        self.max_snapshot_seconds = 0.0
+
+        # One thread, so the snapshots are written in order
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.save)
+
+        # Emitted from the worker thread, so queue the calls to this thread
+        self.saved.connect(self.on_saved, QtCore.Qt.QueuedConnection)
+        self.failed.connect(self.on_failed, QtCore.Qt.QueuedConnection)
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        """Stops saving and waits for the snapshot being written."""
+        self.timer.stop()
+        self.thread_pool.waitForDone()
+
+    def save(self):
+        scene = self.view.scene()
+        if self.writing or scene is None:
+            return
+        # Try again on the next timeout, the changes stay dirty
+        if self.view.dragging_graphics or scene.mouseGrabberItem():
+            return
+
+        start_time = time.perf_counter()
+        snapshot = scene.score_model.take_snapshot()
+        seconds = time.perf_counter() - start_time
+        self.last_snapshot_seconds = seconds
+        self.max_snapshot_seconds = max(self.max_snapshot_seconds, seconds)
+
+        if not snapshot.full and not snapshot.dirty_ids:
+            return
+
+        self.writing = True
+        self.thread_pool.start(
+            SnapshotWriter(
+                self.filename,
+                snapshot,
+                self.view.get_kind_resources(),
+                self,
+            )
+        )
+
+    def on_saved(self, num_bytes: int, seconds: float):
+        self.writing = False
+        QtCore.qDebug(
+            f"Autosaved {num_bytes} bytes in {seconds * 1000:.1f} ms, the "
+            f"snapshot took {self.last_snapshot_seconds * 1000:.3f} ms"
+        )
+
+    def on_failed(self, message: str):
+        self.writing = False
+        # The changes of the failed snapshot are gone, so save all the
+        # records next time
+        scene = self.view.scene()
+        if scene is not None:
+            scene.score_model.all_dirty = True
+        QtCore.qWarning(f"Autosave failed: {message}")
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from itertools import islice
+from typing import Iterator, Optional, TYPE_CHECKING
+import time
+
+from PySide2 import QtCore
+
+if TYPE_CHECKING:
+    from views.score_virtualizer import ScoreVirtualizer
+
+# The number of records loaded between two checks of the time slice
+CHUNK_SIZE = 64
+
+
+class ScoreLoader(QtCore.QObject):
+    """Streams the records of a loaded score into the scene.
+
+    The records are read from a generator in time slices, one slice per
+    event loop iteration, so the GUI stays responsive while a large score is
+    loading. Each record is indexed by the virtualizer, and the records near
+    the viewport get their graphics (clones of the prototypes) right away.
+    """
+
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal()
+    cancelled = QtCore.Signal()
+
+    def __init__(
+        self,
+        virtualizer: ScoreVirtualizer,
+        time_slice: float = 0.008,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.virtualizer = virtualizer
+        # The seconds to spend on loading per event loop iteration
+        self.time_slice = time_slice
+        self.record_ids: Optional[Iterator[int]] = None
+        self.num_records = 0
+        self.num_loaded_records = 0
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.load_slice)
+
+    def is_loading(self) -> bool:
+        return self.record_ids is not None
+
+    def start(self, record_ids: Iterator[int], num_records: int):
+        self.stop()
+        self.record_ids = record_ids
+        self.num_records = num_records
+        self.num_loaded_records = 0
+
+        # Show the first slice without waiting for the event loop
+        self.load_slice()
+        if self.is_loading():
+            self.timer.start()
+
+    def cancel(self):
+        if self.is_loading():
+            self.stop()
+            self.cancelled.emit()
+
+    def stop(self):
+        self.timer.stop()
+        self.record_ids = None
+
+    def load_slice(self):
+        if not self.is_loading():
+            return
+
+        region = self.virtualizer.get_region()
+        deadline = time.perf_counter() + self.time_slice
+        while time.perf_counter() < deadline:
+            chunk = list(islice(self.record_ids, CHUNK_SIZE))
+            for record_id in chunk:
+                self.virtualizer.load_record(record_id, region)
+            self.num_loaded_records += len(chunk)
+
+            if len(chunk) < CHUNK_SIZE:
+                self.stop()
+                self.progress.emit(self.num_records, self.num_records)
+                self.finished.emit()
+                return
+
+        self.progress.emit(self.num_loaded_records, self.num_records)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from typing import Dict, Optional, TYPE_CHECKING
+
+from PySide2 import QtCore
+
+from app.graphic import Graphic
+from app.score_model import ScoreModel, ScoreModelListener
+from app.spatial_index import PointGridIndex
+from views.score_loader import ScoreLoader
+
+if TYPE_CHECKING:
+    from views.my_graphics_view import MyGraphicsView
+
+
+class ScoreVirtualizer(ScoreModelListener):
+    """Materializes graphics only for the records in and near the viewport.
+
+    All records stay in the score model of the scene. When a record comes
+    near the viewport, a graphic is cloned from the cached prototype and bound
+    to it. When the record goes away, the graphic is returned to the pool of
+    its prototype and the record stays in the model.
+    """
+
+    def __init__(self, view: MyGraphicsView, margin: float = 512):
+        # The margin around the viewport, it should be larger than the
+        # graphics because the records are indexed by their top-left points
+        self.margin = margin
+        self.view = view
+        self.score_model: Optional[ScoreModel] = None
+        self.record_index = PointGridIndex()
+        # The graphics that the virtualizer manages, the other graphics (e.g.,
+        # the dragging graphics) are left alone
+        self.graphics: Dict[int, Graphic] = {}
+
+        # Coalesce the updates of the same event loop iteration
+        self.update_timer = QtCore.QTimer(view)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.update)
+
+        # Streams the records of the loaded scores in
+        self.loader = ScoreLoader(self, parent=view)
+
+    def set_score_model(self, score_model: Optional[ScoreModel]):
+        if self.score_model is not None:
+            self.score_model.listeners.remove(self)
+        self.loader.stop()
+        self.record_index.clear()
+        self.graphics.clear()
+
+        self.score_model = score_model
+        if score_model is None:
+            return
+
+        score_model.listeners.append(self)
+        self.index_records()
+
+    def schedule_update(self):
+        self.update_timer.start(0)
+
+    def update(self):
+        if self.score_model is None or not self.view.scene():
+            return
+
+        wanted_ids = self.record_index.query_rect(self.get_region())
+        for record_id in list(self.graphics):
+            if record_id not in wanted_ids:
+                self.release_graphic(record_id)
+        for record_id in wanted_ids:
+            # Skip the records that already have graphics (e.g., dragging)
+            if record_id not in self.score_model.views:
+                self.materialize_graphic(record_id)
+
+    def adopt(self, graphic: Graphic):
+        """Lets the virtualizer manage a graphic added by other code (e.g., a
+        dropped graphic).
+        """
+        if graphic.score_model is self.score_model:
+            self.graphics[graphic.record_id] = graphic
+
+    def get_region(self) -> QtCore.QRectF:
+        viewport_rect = self.view.viewport().rect()
+        region = self.view.mapToScene(viewport_rect).boundingRect()
+        region.adjust(-self.margin, -self.margin, self.margin, self.margin)
+        return region
+
+    def materialize_graphic(self, record_id: int):
+        record = self.score_model.get(record_id)
+        prototype = self.view.find_or_create_prototype(record.kind)
+        graphic = prototype.clone_record(self.score_model, record_id)
+        self.graphics[record_id] = graphic
+        self.view.scene().addItem(graphic)
+
+    def release_graphic(self, record_id: int):
+        graphic = self.graphics.pop(record_id)
+        # Unbind first, otherwise removing it would remove the record too
+        graphic.unbind_record()
+        if graphic.scene():
+            graphic.scene().removeItem(graphic)
+        graphic.pool.release(graphic)
+
+    def index_records(self):
+        for record_id in self.score_model.iter_ids():
+            self.index_record(record_id)
+        self.schedule_update()
+
+    def load_record(self, record_id: int, region: QtCore.QRectF):
+        """Indexes a record streamed in by the loader, the graphic is created
+        right away if the record is in the region.
+        """
+        # It may have been removed since the loading started
+        if record_id not in self.score_model:
+            return
+
+        self.index_record(record_id)
+        x = self.score_model.xs[record_id]
+        y = self.score_model.ys[record_id]
+        if (
+            record_id not in self.score_model.views
+            and region.contains(x, y)
+        ):
+            self.materialize_graphic(record_id)
+
+    def index_record(self, record_id: int):
+        x = self.score_model.xs[record_id]
+        y = self.score_model.ys[record_id]
+        self.record_index.insert(record_id, QtCore.QPointF(x, y))
+
+    def on_record_added(self, record_id: int):
+        self.index_record(record_id)
+        self.schedule_update()
+
+    def on_record_removed(self, record_id: int):
+        self.record_index.discard(record_id)
+        self.graphics.pop(record_id, None)
+
+    def on_record_moved(self, record_id: int):
+        self.index_record(record_id)
+
+    def on_records_cleared(self):
+        self.loader.cancel()
+        self.record_index.clear()
+        self.graphics.clear()
+
+    def on_records_loaded(self):
+        self.record_index.clear()
+        self.graphics.clear()
+        # Indexing a large score at once would freeze the GUI
+        self.loader.start(self.score_model.iter_ids(), len(self.score_model))
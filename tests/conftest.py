@@ -0,0 +1,33 @@
+"""Fixtures shared by the tests.
+
+The tests run headless with the offscreen platform plugin, run them from the
+repository root, e.g.:
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.normpath(SRC_DIR))
+
+# Must be set before creating the QApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def app():
+    QtWidgets = pytest.importorskip("PySide2.QtWidgets")
+    app = QtWidgets.QApplication.instance()
+    if not app:
+        app = QtWidgets.QApplication([])
+
+    # Register the icons used by the graphics
+    from resources_loader import register_resources
+
+    register_resources()
+
+    return app
@@ -0,0 +1,57 @@
+import pytest
+
+QtCore = pytest.importorskip("PySide2.QtCore")
+QtGui = pytest.importorskip("PySide2.QtGui")
+QtWidgets = pytest.importorskip("PySide2.QtWidgets")
+
+from app.glyph_cache import GlyphItem  # noqa: E402
+from app.graphic import WholeNote  # noqa: E402
+from app.svg_renderer_registry import svg_renderer_registry  # noqa: E402
+
+
+def count_painted_pixels(image: QtGui.QImage) -> int:
+    return sum(
+        1
+        for y in range(image.height())
+        for x in range(image.width())
+        if QtGui.qAlpha(image.pixel(x, y)) > 0
+    )
+
+
+def paint_glyph_item(transform: QtGui.QTransform) -> QtGui.QImage:
+    filename = WholeNote.NOTE_FILENAME
+    item = GlyphItem(filename)
+    item.setSharedRenderer(svg_renderer_registry.acquire(filename))
+
+    image = QtGui.QImage(128, 128, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(image)
+    painter.setTransform(transform)
+    item.paint(painter, QtWidgets.QStyleOptionGraphicsItem())
+    painter.end()
+
+    svg_renderer_registry.release(filename)
+    return image
+
+
+@pytest.mark.parametrize(
+    "transform",
+    [
+        # Blits the cached pixmap
+        QtGui.QTransform().translate(32, 32),
+        QtGui.QTransform().translate(64, 32).rotate(90),
+        # Falls back to the vector paths
+        QtGui.QTransform().translate(64, 32).rotate(30),
+    ],
+)
+def test_paint_into_image(app, transform):
+    image = paint_glyph_item(transform)
+    assert count_painted_pixels(image) > 0
+
+
+def test_get_scale_and_rotation(app):
+    transform = QtGui.QTransform().scale(2, 2).rotate(90)
+    assert GlyphItem.get_scale_and_rotation(transform) == (2, 90)
+
+    transform = QtGui.QTransform().rotate(45)
+    assert GlyphItem.get_scale_and_rotation(transform)[1] is None
@@ -0,0 +1,107 @@
+import pytest
+
+QtCore = pytest.importorskip("PySide2.QtCore")
+
+from app.graphic import Staff, WholeNote  # noqa: E402
+from views.my_graphics_scene import MyGraphicsScene  # noqa: E402
+
+
+def test_clone_record_keeps_record(app):
+    scene = MyGraphicsScene()
+    score_model = scene.score_model
+    staff_id = score_model.add("staff", 0, 0)
+    record_id = score_model.add("whole_note", 100, 50, staff_id=staff_id)
+
+    graphic = WholeNote().clone_record(score_model, record_id)
+    scene.addItem(graphic)
+
+    # Adding it to the scene of its model doesn't remove the record
+    assert record_id in score_model
+    assert graphic.record_id == record_id
+    assert score_model.get(record_id).staff_id == staff_id
+
+    scene.removeItem(graphic)
+    assert record_id not in score_model
+
+
+def scan_nearest_y(staff: Staff, y: float) -> float:
+    """The nearest line or space found by scanning them all, like the staves
+    did before snapping arithmetically. The lines come first, so they win the
+    ties.
+    """
+    top_y = staff.lines_offset.y()
+    gap = staff.vertical_gap
+    line_ys = [top_y + i * gap for i in range(staff.num_lines)]
+    space_ys = [top_y + (i + 0.5) * gap for i in range(staff.num_lines - 1)]
+    return min(line_ys + space_ys, key=lambda snap_y: abs(snap_y - y))
+
+
+def get_snapped_y(staff: Staff, y: float) -> float:
+    x = staff.lines_offset.x() + 100
+    return staff.get_dest_snap_point(QtCore.QPointF(x, y)).y()
+
+
+def test_snap_to_staff_like_scan(app):
+    staff = Staff()
+    top_y = staff.lines_offset.y()
+    bottom_y = top_y + (staff.num_lines - 1) * staff.vertical_gap
+    # Quarter gaps include the points halfway between a line and a space
+    num_steps = round((bottom_y - top_y) * 4)
+    for i in range(num_steps + 1):
+        y = top_y + i / 4
+        assert get_snapped_y(staff, y) == scan_nearest_y(staff, y), y
+
+
+def test_snap_to_staff_lines_and_spaces(app):
+    staff = Staff()
+    top_y = staff.lines_offset.y()
+    gap = staff.vertical_gap
+    # On a line
+    assert get_snapped_y(staff, top_y + 2 * gap) == top_y + 2 * gap
+    # In a space
+    assert get_snapped_y(staff, top_y + 1.5 * gap + 1) == top_y + 1.5 * gap
+    # Halfway between a line and a space
+    assert get_snapped_y(staff, top_y + gap / 4) == top_y
+    assert get_snapped_y(staff, top_y + 3 * gap / 4) == top_y + gap
+
+
+def test_snap_to_ledger_lines(app):
+    staff = Staff()
+    top_y = staff.lines_offset.y()
+    gap = staff.vertical_gap
+    bottom_y = top_y + (staff.num_lines - 1) * gap
+    ledger_height = staff.num_ledger_lines * gap
+
+    assert get_snapped_y(staff, top_y - gap) == top_y - gap
+    assert get_snapped_y(staff, bottom_y + 1.5 * gap) == bottom_y + 1.5 * gap
+    # Beyond the last ledger lines, but still in the snap area
+    assert get_snapped_y(staff, top_y - ledger_height - 4) == (
+        top_y - ledger_height
+    )
+    assert get_snapped_y(staff, bottom_y + ledger_height + 4) == (
+        bottom_y + ledger_height
+    )
+    # Outside the snap area
+    y = bottom_y + ledger_height + 20
+    assert get_snapped_y(staff, y) == y
+
+
+@pytest.mark.parametrize("scale, rotation", [(2, 0), (0.5, 0), (1, 90)])
+def test_snap_to_transformed_staff(app, scale, rotation):
+    staff = Staff()
+    staff.setScale(scale)
+    staff.setRotation(rotation)
+    assert staff.can_be_snapped() == (rotation == 0)
+
+    # Map the scene points to the staff like snap_item_to_nearest_item
+    top_y = staff.lines_offset.y()
+    x = staff.lines_offset.x() + 100
+    for local_y in (top_y + 3, top_y + 12, top_y + 27.5, top_y + 38):
+        scene_pos = staff.mapToScene(QtCore.QPointF(x, local_y))
+        local_pos = staff.mapFromScene(scene_pos)
+        dest_pos = staff.mapToScene(staff.get_dest_snap_point(local_pos))
+        expected_pos = staff.mapToScene(
+            QtCore.QPointF(x, scan_nearest_y(staff, local_y))
+        )
+        assert dest_pos.x() == pytest.approx(expected_pos.x())
+        assert dest_pos.y() == pytest.approx(expected_pos.y())
@@ -0,0 +1,27 @@
+import os
+
+from process_pool import imap_unordered_isolated
+
+
+def double_or_die(number: int) -> int:
+    # Like a crash in native code, no exception reaches the pool
+    if number < 0:
+        os._exit(1)
+    return 2 * number
+
+
+def test_survive_dead_worker():
+    results = imap_unordered_isolated(
+        double_or_die,
+        [1, 2, -1, 3, 4],
+        num_jobs=2,
+        on_worker_died=lambda number: f"died {number}",
+    )
+    assert sorted(results, key=str) == [2, 4, 6, 8, "died -1"]
+
+
+def test_without_dead_worker():
+    results = imap_unordered_isolated(
+        double_or_die, range(5), num_jobs=2, on_worker_died=str
+    )
+    assert sorted(results) == [0, 2, 4, 6, 8]
@@ -0,0 +1,66 @@
+import pytest
+
+from app.score_file import HEADER, load_score, save_score
+from app.score_model import KINDS, ScoreModel
+
+KIND_RESOURCES = {kind: [] for kind in KINDS}
+# The size of all the columns of a record but the kind ids
+RECORD_SIZE_WITHOUT_KIND = 8 + 8 + 4 + 4 + 2
+
+
+@pytest.fixture
+def score_data(tmp_path) -> bytes:
+    score_model = ScoreModel()
+    for i in range(10):
+        score_model.add(KINDS[i % len(KINDS)], i, 2 * i)
+    score_model.remove(3)
+    filename = tmp_path / "score.score"
+    save_score(str(filename), score_model, KIND_RESOURCES)
+    return filename.read_bytes()
+
+
+def load_data(tmp_path, data: bytes) -> ScoreModel:
+    filename = tmp_path / "loaded.score"
+    filename.write_bytes(data)
+    score_model = ScoreModel()
+    load_score(str(filename), score_model)
+    return score_model
+
+
+def test_load_score(tmp_path, score_data):
+    score_model = load_data(tmp_path, score_data)
+    assert len(score_model) == 9
+    assert score_model.free_ids == [3]
+    assert score_model.get(4).x == 4
+
+
+@pytest.mark.parametrize("size", [0, 10, HEADER.size, HEADER.size + 7, 200])
+def test_load_truncated_score(tmp_path, score_data, size):
+    with pytest.raises(ValueError):
+        load_data(tmp_path, score_data[:size])
+
+
+@pytest.mark.parametrize("kind_id", [len(KINDS), 100])
+def test_load_unknown_kind_id(tmp_path, score_data, kind_id):
+    data = bytearray(score_data)
+    data[HEADER.size + 10 * RECORD_SIZE_WITHOUT_KIND] = kind_id
+    with pytest.raises(ValueError):
+        load_data(tmp_path, bytes(data))
+
+
+def test_save_over_opened_score(tmp_path, score_data):
+    filename = tmp_path / "score.score"
+    filename.write_bytes(score_data)
+    score_model = ScoreModel()
+    load_score(str(filename), score_model)
+    mapping = score_model.xs.obj
+
+    score_model.set_pos(4, 100, 200)
+    save_score(str(filename), score_model, KIND_RESOURCES)
+    # Saving closes the mapping, a mapped file can't be replaced on Windows
+    assert mapping.closed
+
+    saved_model = ScoreModel()
+    load_score(str(filename), saved_model)
+    assert saved_model.get(4).x == 100
+    assert len(saved_model) == 9
@@ -0,0 +1,95 @@
+from app.score_journal import (
+    JOURNAL_SUFFIX,
+    move_autosave,
+    read_journal,
+    recover_score,
+    write_snapshot,
+)
+from app.score_model import KINDS, ScoreModel
+
+KIND_RESOURCES = {kind: [] for kind in KINDS}
+
+
+def create_score_model() -> ScoreModel:
+    score_model = ScoreModel()
+    for i in range(10):
+        score_model.add(KINDS[i % len(KINDS)], i, 2 * i)
+    return score_model
+
+
+def get_values(score_model: ScoreModel):
+    return [list(column) for column in score_model.get_columns()]
+
+
+def autosave(filename: str, score_model: ScoreModel):
+    write_snapshot(filename, score_model.take_snapshot(), KIND_RESOURCES)
+
+
+def test_recover_base_file(tmp_path):
+    filename = str(tmp_path / "autosave.score")
+    score_model = create_score_model()
+    autosave(filename, score_model)
+
+    recovered_model = ScoreModel()
+    recover_score(filename, recovered_model)
+    assert get_values(recovered_model) == get_values(score_model)
+
+
+def test_recover_journal(tmp_path):
+    filename = str(tmp_path / "autosave.score")
+    score_model = create_score_model()
+    autosave(filename, score_model)
+
+    score_model.set_pos(2, 100, 200)
+    score_model.remove(5)
+    autosave(filename, score_model)
+    score_model.add("staff", 300, 400)
+    score_model.add("half_note", 500, 600)
+    autosave(filename, score_model)
+    assert len(list(read_journal(filename + JOURNAL_SUFFIX))) == 4
+
+    recovered_model = ScoreModel()
+    recover_score(filename, recovered_model)
+    assert get_values(recovered_model) == get_values(score_model)
+    assert recovered_model.get(2).x == 100
+    assert recovered_model.get(10).kind == "half_note"
+
+
+def test_ignore_partly_written_batch(tmp_path):
+    filename = str(tmp_path / "autosave.score")
+    score_model = create_score_model()
+    autosave(filename, score_model)
+    score_model.set_pos(2, 100, 200)
+    autosave(filename, score_model)
+    saved_values = get_values(score_model)
+
+    # The application crashed while writing the last batch
+    journal_filename = filename + JOURNAL_SUFFIX
+    with open(journal_filename, "rb") as f:
+        batch = f.read()
+    score_model.set_pos(3, 300, 400)
+    autosave(filename, score_model)
+    with open(journal_filename, "r+b") as f:
+        f.truncate(len(batch) + len(batch) // 2)
+
+    recovered_model = ScoreModel()
+    recover_score(filename, recovered_model)
+    assert get_values(recovered_model) == saved_values
+
+
+def test_recover_moved_autosave(tmp_path):
+    filename = str(tmp_path / "autosave.score")
+    previous_filename = str(tmp_path / "autosave.previous.score")
+    score_model = create_score_model()
+    autosave(filename, score_model)
+    score_model.set_pos(2, 100, 200)
+    autosave(filename, score_model)
+
+    # A journal of an older moved autosave mustn't be applied
+    with open(previous_filename + JOURNAL_SUFFIX, "wb") as f:
+        f.write(b"stale")
+    move_autosave(filename, previous_filename)
+
+    recovered_model = ScoreModel()
+    recover_score(previous_filename, recovered_model)
+    assert get_values(recovered_model) == get_values(score_model)
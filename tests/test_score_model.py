@@ -0,0 +1,27 @@
+from app.score_model import KINDS, ScoreModel
+
+
+def get_values(columns):
+    return [list(column) for column in columns]
+
+
+def test_take_snapshot_copies_changes():
+    score_model = ScoreModel()
+    for i in range(100):
+        score_model.add(KINDS[i % len(KINDS)], i, i)
+    snapshot = score_model.take_snapshot()
+    assert snapshot.full
+
+    score_model.set_pos(10, 1, 2)
+    score_model.set_rotation(20, 90)
+    score_model.remove(30)
+    score_model.add("staff", 3, 4)
+    score_model.add("half_note", 5, 6)
+    snapshot = score_model.take_snapshot()
+
+    assert not snapshot.full
+    assert snapshot.dirty_ids == {10, 20, 30, 100}
+    assert snapshot.num_removed_records == 0
+    assert get_values(snapshot.columns) == get_values(
+        score_model.get_columns()
+    )
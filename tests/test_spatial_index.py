@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+QtCore = pytest.importorskip("PySide2.QtCore")
+
+from app.spatial_index import GridIndex, PointGridIndex  # noqa: E402
+
+CELL_SIZE = 100
+
+
+def create_random_rects(count: int, seed: int = 1):
+    generator = random.Random(seed)
+    return {
+        key: QtCore.QRectF(
+            generator.uniform(-500, 500),
+            generator.uniform(-500, 500),
+            generator.uniform(1, 250),
+            generator.uniform(1, 250),
+        )
+        for key in range(count)
+    }
+
+
+def test_grid_index_insert_move_discard():
+    index = GridIndex(CELL_SIZE)
+    # Across the cell boundaries around the origin
+    index.insert("a", QtCore.QRectF(-50, -50, 100, 100))
+    assert len(index.get_cells(index.rects["a"])) == 4
+    assert index.query_point(QtCore.QPointF(-10, -10)) == ["a"]
+    assert index.query_point(QtCore.QPointF(10, 10)) == ["a"]
+
+    # Move to other cells
+    index.insert("a", QtCore.QRectF(150, -250, 20, 20))
+    assert len(index) == 1
+    assert index.query_point(QtCore.QPointF(10, 10)) == []
+    assert index.query_point(QtCore.QPointF(160, -240)) == ["a"]
+    assert set(index.cells) == {(1, -3)}
+
+    index.discard("a")
+    assert "a" not in index
+    assert len(index) == 0
+    assert not index.cells
+
+
+def test_grid_index_queries_like_brute_force():
+    rects = create_random_rects(200)
+    index = GridIndex(CELL_SIZE)
+    for key, rect in rects.items():
+        index.insert(key, rect)
+    # Move some and remove some
+    moved_rects = create_random_rects(50, seed=2)
+    for key, rect in moved_rects.items():
+        index.insert(key, rect)
+        rects[key] = rect
+    for key in range(50, 80):
+        index.discard(key)
+        del rects[key]
+
+    generator = random.Random(3)
+    for _ in range(200):
+        point = QtCore.QPointF(
+            generator.uniform(-600, 600), generator.uniform(-600, 600)
+        )
+        expected_keys = {
+            key for key, rect in rects.items() if rect.contains(point)
+        }
+        assert set(index.query_point(point)) == expected_keys
+
+        query_rect = QtCore.QRectF(point, QtCore.QSizeF(120, 80))
+        expected_keys = {
+            key for key, rect in rects.items() if rect.intersects(query_rect)
+        }
+        assert index.query_rect(query_rect) == expected_keys
+
+
+def test_point_grid_index_insert_move_discard():
+    index = PointGridIndex(CELL_SIZE)
+    index.insert(3, QtCore.QPointF(-1, -1))
+    assert 3 in index
+    assert 0 not in index
+    assert index.query_rect(QtCore.QRectF(-10, -10, 5, 5)) == {3}
+    assert index.query_rect(QtCore.QRectF(0, 0, 5, 5)) == set()
+
+    # Across a cell boundary
+    index.insert(3, QtCore.QPointF(1, 1))
+    assert len(index) == 1
+    assert index.query_rect(QtCore.QRectF(0, 0, 5, 5)) == {3}
+    assert set(index.cells) == {(0, 0)}
+
+    index.discard(3)
+    assert 3 not in index
+    assert len(index) == 0
+    assert not index.cells
+
+
+@pytest.mark.parametrize("query_size", [50, 2000])
+def test_point_grid_index_queries_like_brute_force(query_size):
+    generator = random.Random(4)
+    points = {
+        key: QtCore.QPointF(
+            generator.uniform(-800, 800), generator.uniform(-800, 800)
+        )
+        for key in range(300)
+    }
+    index = PointGridIndex(CELL_SIZE)
+    for key, point in points.items():
+        index.insert(key, point)
+    for key in range(0, 300, 7):
+        points[key] = QtCore.QPointF(
+            generator.uniform(-800, 800), generator.uniform(-800, 800)
+        )
+        index.insert(key, points[key])
+    for key in range(0, 300, 11):
+        index.discard(key)
+        del points[key]
+    assert len(index) == len(points)
+
+    for _ in range(100):
+        query_rect = QtCore.QRectF(
+            generator.uniform(-900, 900),
+            generator.uniform(-900, 900),
+            query_size,
+            query_size,
+        )
+        found_keys = index.query_rect(query_rect)
+        # All the points in the cells that overlap the rectangle
+        cell_rect = QtCore.QRectF(
+            QtCore.QPointF(
+                (query_rect.left() // CELL_SIZE) * CELL_SIZE,
+                (query_rect.top() // CELL_SIZE) * CELL_SIZE,
+            ),
+            QtCore.QPointF(
+                (query_rect.right() // CELL_SIZE + 1) * CELL_SIZE,
+                (query_rect.bottom() // CELL_SIZE + 1) * CELL_SIZE,
+            ),
+        )
+        expected_keys = {
+            key
+            for key, point in points.items()
+            if cell_rect.left() <= point.x() < cell_rect.right()
+            and cell_rect.top() <= point.y() < cell_rect.bottom()
+        }
+        assert found_keys == expected_keys
@@ -0,0 +1,70 @@
+import pytest
+
+QtCore = pytest.importorskip("PySide2.QtCore")
+shiboken2 = pytest.importorskip("shiboken2")
+
+from app.graphic import HalfNote, Staff, WholeNote  # noqa: E402
+from app.svg_renderer_registry import SvgRendererRegistry  # noqa: E402
+
+FILENAMES = [
+    WholeNote.NOTE_FILENAME,
+    HalfNote.NOTE_FILENAME,
+    Staff.G_CLEF_FILENAME,
+]
+
+
+def test_release_when_graphic_destroyed(app):
+    registry = SvgRendererRegistry()
+    prototype = WholeNote()
+    prototype.svg_renderers = registry
+
+    graphics = [prototype.clone() for _ in range(2)]
+    assert registry.ref_counts[WholeNote.NOTE_FILENAME] == 2
+    assert registry.get_stats()["referenced"] == 1
+
+    # Deleting a graphic deletes its SVG items, which release the renderer
+    shiboken2.delete(graphics.pop())
+    assert registry.ref_counts[WholeNote.NOTE_FILENAME] == 1
+    shiboken2.delete(graphics.pop())
+    assert registry.ref_counts[WholeNote.NOTE_FILENAME] == 0
+    assert registry.get_stats()["referenced"] == 0
+    # Unreferenced renderers stay cached within the budget
+    assert WholeNote.NOTE_FILENAME in registry
+
+
+def test_evict_least_recently_used(app):
+    costs = [QtCore.QFile(filename).size() for filename in FILENAMES]
+    registry = SvgRendererRegistry(memory_budget=sum(costs))
+    for filename in FILENAMES:
+        registry.find_or_create(filename)
+    # Use the first one again, so the second one is the least recently used
+    registry.find_or_create(FILENAMES[0])
+
+    registry.set_memory_budget(sum(costs) - 1)
+    assert [filename in registry for filename in FILENAMES] == [
+        True,
+        False,
+        True,
+    ]
+    stats = registry.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_usage"] == costs[0] + costs[2]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_keep_referenced_renderers(app):
+    registry = SvgRendererRegistry()
+    registry.acquire(FILENAMES[0])
+    for filename in FILENAMES[1:]:
+        registry.find_or_create(filename)
+
+    registry.set_memory_budget(0)
+    assert [filename in registry for filename in FILENAMES] == [
+        True,
+        False,
+        False,
+    ]
+
+    registry.release(FILENAMES[0])
+    assert FILENAMES[0] not in registry